@@ -8,22 +8,39 @@ Pipeline Steps:
 2. Wait for AI analysis (clips.json)
 3. Extract clips from video
 4. Crop to vertical format (9:16)
-5. Add karaoke subtitles
+5. Add subtitles (karaoke with --karaoke)
 6. Final shorts ready for upload
 
 Usage:
     python run_pipeline.py                    # Run full pipeline
     python run_pipeline.py --from-step 3      # Resume from step 3
     python run_pipeline.py --skip-transcribe  # Skip transcription
+    python run_pipeline.py --stream           # Run steps 3-5 concurrently, clip by clip
+    python run_pipeline.py --wait-timeout 30  # Unattended: wait up to 30 min for clips.json
+    python run_pipeline.py --karaoke          # Word-by-word karaoke subtitles (slower to render)
 """
 
+import importlib
+import os
 import sys
 import subprocess
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
 from datetime import datetime
 import json
 
+try:
+    # Optional: OS file-change notifications (inotify / FSEvents / ReadDirectoryChangesW)
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+if os.name != 'nt':
+    import select
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 SCRIPTS_DIR = SCRIPT_DIR / "scripts"
@@ -39,19 +56,44 @@ TRANSCRIPTS_DIR = OUTPUT_DIR / "transcripts"
 # Required files
 CLIPS_JSON = AI_ANALYSIS_DIR / "clips.json"
 
+# The step scripts (and their shared helpers) are importable for --stream mode
+sys.path.insert(0, str(STEPS_DIR))
+
+# One state file, shared with the step scripts (they record per-clip progress in it)
+import pipeline_state
+from pipeline_state import STATE_FILE, load_state
+
+# --stream: worker processes per stage (each FFmpeg run is multi-threaded itself).
+# 'render' crops and burns subtitles in one FFmpeg run per clip.
+STREAM_WORKERS = {
+    'extract': max(1, (os.cpu_count() or 2) // 2),
+    'render': max(1, (os.cpu_count() or 2) // 2),
+}
+
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.m4v'})
+
+def find_first_file(directory, accept):
+    """
+    First regular file in directory whose name passes accept(name), or None.
+    os.scandir entries carry the file type from the directory listing, so
+    names are filtered without building a Path or stat()ing every entry.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if accept(entry.name) and entry.is_file():
+                    return Path(entry.path)
+    except FileNotFoundError:
+        pass
+    return None
+
 def get_video_file():
     """Find the first video file in the input directory"""
-    VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.m4v']
-    video_files = [f for f in INPUT_DIR.iterdir() if f.is_file() and f.suffix.lower() in VIDEO_EXTENSIONS]
-    return video_files[0] if video_files else None
+    return find_first_file(INPUT_DIR, lambda name: os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS)
 
 def get_transcript_file():
     """Find the first transcript JSON file in the transcripts directory"""
-    transcript_files = [f for f in TRANSCRIPTS_DIR.glob("*_transcript.json") if f.is_file()]
-    return transcript_files[0] if transcript_files else None
-
-# Pipeline state file
-STATE_FILE = OUTPUT_DIR / "pipeline_state.json"
+    return find_first_file(TRANSCRIPTS_DIR, lambda name: name.endswith("_transcript.json"))
 
 class Colors:
     """ANSI color codes for terminal output"""
@@ -65,57 +107,62 @@ class Colors:
     UNDERLINE = '\033[4m'
     END = '\033[0m'
 
+# Plain text when stdout isn't a terminal, so log files don't fill up with escape codes
+if not sys.stdout.isatty():
+    for _name in [name for name in vars(Colors) if name.isupper()]:
+        setattr(Colors, _name, '')
+
+# Message templates, built once (the escape codes never change at runtime)
+_HEADER_BAR = f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}"
+_HEADER_TEXT = f"{Colors.BOLD}{Colors.CYAN}{{}}{Colors.END}"
+_STEP_TITLE = f"{Colors.BOLD}{Colors.BLUE}[Step {{}}] {{}}{Colors.END}"
+_STEP_RULE = f"{Colors.BLUE}{'-'*70}{Colors.END}"
+_SUCCESS = f"{Colors.GREEN}✓ {{}}{Colors.END}\n"
+_ERROR = f"{Colors.RED}✗ {{}}{Colors.END}\n"
+_WARNING = f"{Colors.YELLOW}⚠ {{}}{Colors.END}\n"
+_INFO = f"{Colors.CYAN}ℹ {{}}{Colors.END}\n"
+
 def print_header(text):
     """Print a fancy header"""
-    print(f"\n{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{text.center(70)}{Colors.END}")
-    print(f"{Colors.BOLD}{Colors.CYAN}{'='*70}{Colors.END}\n")
+    sys.stdout.write(f"\n{_HEADER_BAR}\n{_HEADER_TEXT.format(text.center(70))}\n{_HEADER_BAR}\n\n")
 
 def print_step(step_num, title):
     """Print step header"""
-    print(f"\n{Colors.BOLD}{Colors.BLUE}[Step {step_num}] {title}{Colors.END}")
-    print(f"{Colors.BLUE}{'-'*70}{Colors.END}")
+    sys.stdout.write(f"\n{_STEP_TITLE.format(step_num, title)}\n{_STEP_RULE}\n")
 
 def print_success(message):
     """Print success message"""
-    print(f"{Colors.GREEN}✓ {message}{Colors.END}")
+    sys.stdout.write(_SUCCESS.format(message))
 
 def print_error(message):
     """Print error message"""
-    print(f"{Colors.RED}✗ {message}{Colors.END}")
+    sys.stdout.write(_ERROR.format(message))
 
 def print_warning(message):
     """Print warning message"""
-    print(f"{Colors.YELLOW}⚠ {message}{Colors.END}")
+    sys.stdout.write(_WARNING.format(message))
 
 def print_info(message):
     """Print info message"""
-    print(f"{Colors.CYAN}ℹ {message}{Colors.END}")
-
-def load_state():
-    """Load pipeline state from file"""
-    if STATE_FILE.exists():
-        with open(STATE_FILE, 'r') as f:
-            return json.load(f)
-    return {"completed_steps": [], "last_run": None}
+    sys.stdout.write(_INFO.format(message))
 
 def save_state(state):
-    """Save pipeline state to file"""
+    """Save pipeline state to file (atomically, through pipeline_state)"""
     state["last_run"] = datetime.now().isoformat()
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=2)
+    pipeline_state.save_state(state)
 
-def run_script(script_name, description):
-    """Run a Python script and return success status"""
+def run_script(script_name, description, args=()):
+    """Run a Python script (with optional command-line args) and return success status"""
     script_path = STEPS_DIR / script_name
     
     print_info(f"Running: {script_name}")
-    print_info(f"Command: python {script_path}")
+    print_info(f"Command: python {' '.join([str(script_path), *args])}")
     print()
+    sys.stdout.flush()  # Our buffered lines go out before the child's output
     
     try:
         result = subprocess.run(
-            [sys.executable, str(script_path)],
+            [sys.executable, str(script_path), *args],
             cwd=SCRIPT_DIR,
             check=False
         )
@@ -130,8 +177,36 @@ def run_script(script_name, description):
         print_error(f"Exception running {script_name}: {e}")
         return False
 
+def start_clips_watcher(on_found):
+    """Call on_found() as soon as clips.json is created/moved into AI_ANALYSIS_DIR (None without watchdog)"""
+    if Observer is None:
+        return None
+
+    class ClipsJsonHandler(FileSystemEventHandler):
+        def _check(self, path):
+            if Path(path).name == CLIPS_JSON.name:
+                on_found()
+
+        def on_created(self, event):
+            self._check(event.src_path)
+
+        def on_modified(self, event):
+            self._check(event.src_path)
+
+        def on_moved(self, event):
+            self._check(event.dest_path)
+
+    observer = Observer()
+    observer.schedule(ClipsJsonHandler(), str(AI_ANALYSIS_DIR), recursive=False)
+    observer.start()
+    return observer
+
 def wait_for_clips_json(timeout_minutes=None):
-    """Wait for clips.json to appear in ai_analysis folder"""
+    """
+    Wait for clips.json to appear in ai_analysis folder.
+    With a timeout and no terminal on stdin (CI, cron, pipes) nothing is
+    prompted: it just waits for the file and fails once the timeout expires.
+    """
     print_info("Waiting for AI analysis to complete...")
     print_info(f"Looking for: {CLIPS_JSON}")
     print()
@@ -140,59 +215,222 @@ def wait_for_clips_json(timeout_minutes=None):
         print_success("clips.json already exists!")
         return True
     
+    headless = timeout_minutes is not None and not sys.stdin.isatty()
+    
     print_warning("clips.json not found")
     print()
     print(f"{Colors.YELLOW}Please run your external AI analysis and save clips.json to:{Colors.END}")
     print(f"  {Colors.BOLD}{AI_ANALYSIS_DIR}{Colors.END}")
     print()
-    print(f"{Colors.CYAN}Options:{Colors.END}")
-    print("  1. Press ENTER to check again")
-    print("  2. Type 'skip' to skip to next available step")
-    print("  3. Type 'quit' to exit")
+    if headless:
+        print_info(f"Non-interactive: waiting up to {timeout_minutes} minutes")
+    else:
+        print(f"{Colors.CYAN}Options:{Colors.END}")
+        print("  1. Press ENTER to check again")
+        print("  2. Type 'skip' to skip to next available step")
+        print("  3. Type 'quit' to exit")
     print()
     
+    # Both the file watcher and the prompt wake the main thread through `wake`,
+    # so waiting costs no CPU and the file is picked up the moment it lands.
+    # On POSIX terminals the prompt is select()ed together with a self-pipe
+    # instead of read in a thread, so no stray reader is left on stdin for
+    # the interactive prompts of later steps.
+    wake = threading.Event()
+    lines = []
+    use_select = not headless and os.name != 'nt' and sys.stdin.isatty()
+    pipe_r, pipe_w = os.pipe() if use_select else (None, None)
+
+    def notify():
+        wake.set()
+        if pipe_w is not None:
+            os.write(pipe_w, b'x')
+
+    def read_lines():
+        while True:
+            try:
+                line = input()
+            except (EOFError, OSError):
+                line = None
+            lines.append(line)
+            notify()
+            if line is None:
+                return
+
+    observer = start_clips_watcher(notify)
+    check_interval = None if observer else 5  # seconds - stat() fallback without watchdog
+    if not observer:
+        print_info("Install 'watchdog' to detect clips.json instantly (checking every 5s)")
+    if not use_select and not headless:
+        threading.Thread(target=read_lines, daemon=True).start()
+    
     start_time = time.time()
-    check_interval = 5  # seconds
+    prompt = '' if headless else f"{Colors.CYAN}> {Colors.END}"
     
-    while True:
-        # Check if file appeared
-        if CLIPS_JSON.exists():
-            print_success("clips.json detected!")
-            return True
-        
-        # Check timeout
-        if timeout_minutes:
-            elapsed = (time.time() - start_time) / 60
-            if elapsed > timeout_minutes:
-                print_error(f"Timeout after {timeout_minutes} minutes")
-                return False
-        
-        # Wait for user input
-        try:
-            user_input = input(f"{Colors.CYAN}> {Colors.END}").strip().lower()
+    try:
+        print(prompt, end='', flush=True)
+        while True:
+            # Check if file appeared
+            if CLIPS_JSON.exists():
+                print()
+                print_success("clips.json detected!")
+                return True
             
-            if user_input == 'quit':
-                print_info("Exiting pipeline")
-                return False
-            elif user_input == 'skip':
-                print_warning("Skipping clip extraction step")
-                return False
-            elif user_input == '' or user_input == '1':
-                print_info("Checking for clips.json...")
-                if CLIPS_JSON.exists():
-                    print_success("clips.json found!")
-                    return True
+            # Check timeout
+            timeout = check_interval
+            if timeout_minutes:
+                remaining = timeout_minutes * 60 - (time.time() - start_time)
+                if remaining <= 0:
+                    print()
+                    print_error(f"Timeout after {timeout_minutes} minutes")
+                    return False
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            
+            # Sleep until the watcher fires, the user types something, or the timeout
+            if use_select:
+                ready, _, _ = select.select([sys.stdin, pipe_r], [], [], timeout)
+                if pipe_r in ready:
+                    os.read(pipe_r, 64)
+                if sys.stdin in ready:
+                    line = sys.stdin.readline()
+                    lines.append(line.rstrip('\n') if line else None)
+            else:
+                wake.wait(timeout)
+                wake.clear()
+            
+            while lines:
+                user_input = lines.pop(0)
+                if user_input is None:
+                    print()
+                    print_info("Input closed - exiting pipeline")
+                    return False
+                user_input = user_input.strip().lower()
+                
+                if user_input == 'quit':
+                    print_info("Exiting pipeline")
+                    return False
+                elif user_input == 'skip':
+                    print_warning("Skipping clip extraction step")
+                    return False
+                elif user_input == '' or user_input == '1':
+                    print_info("Checking for clips.json...")
+                    if CLIPS_JSON.exists():
+                        print_success("clips.json found!")
+                        return True
+                    else:
+                        print_warning("Still not found. Press ENTER to check again.")
                 else:
-                    print_warning("Still not found. Press ENTER to check again.")
+                    print_warning("Invalid input. Press ENTER, 'skip', or 'quit'")
+                print(prompt, end='', flush=True)
+    except KeyboardInterrupt:
+        print()
+        print_info("Pipeline interrupted by user")
+        return False
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
+        if use_select:
+            os.close(pipe_r)
+            os.close(pipe_w)
+
+def run_streaming_steps(karaoke=False):
+    """
+    Run steps 3-5 as a producer-consumer chain: a clip is cropped and subtitled
+    as soon as it's extracted, so the total time approaches the slowest stage
+    instead of the sum of all three. Cropping and subtitles share one FFmpeg
+    run per clip (a single decode + encode, no intermediate cropped video).
+    """
+    extract = importlib.import_module("2_extract_clips")
+    crop = importlib.import_module("3_crop_to_vertical")
+    subtitles = importlib.import_module("4_add_subtitles")
+    importlib.import_module("ffmpeg_utils").require_ffmpeg()
+    
+    with open(CLIPS_JSON, 'r', encoding='utf-8') as f:
+        clips = json.load(f)
+    
+    # Workers can't prompt: ask for the episode layout up front
+    num_speakers = crop.prompt_num_speakers()
+    if num_speakers not in crop.CROP_CONFIGS:
+        print_error(f"No crop configuration for {num_speakers} speakers")
+        return False
+    
+    video_file = get_video_file()
+    stream_copy = extract.STREAM_COPY and extract.probe_video_codec(video_file) == 'h264'
+    source = extract.progress_source(video_file)
+    
+    print_info(f"Streaming {len(clips)} clip(s): extract → crop + subtitles")
+    print_info("Scenes that can't be auto-detected are cropped both ways")
+    print()
+    
+    failed = 0
+    finished = 0
+    
+    with ProcessPoolExecutor(STREAM_WORKERS['extract']) as extract_pool, \
+         ProcessPoolExecutor(STREAM_WORKERS['render']) as render_pool:
+        
+        pending = {}  # future -> (stage, item)
+        
+        def submit_crop(clip_file):
+            pending[render_pool.submit(subtitles.crop_and_subtitle_one, clip_file, num_speakers, karaoke)] = ('render', clip_file)
+        
+        for clip in clips:
+            clip_file = extract.clip_output_file(clip)
+            if pipeline_state.output_exists(clip_file):
+                submit_crop(clip_file)  # Extracted by a previous run
             else:
-                print_warning("Invalid input. Press ENTER, 'skip', or 'quit'")
-        except KeyboardInterrupt:
-            print()
-            print_info("Pipeline interrupted by user")
-            return False
+                pending[extract_pool.submit(extract.process_one, clip, video_file, stream_copy)] = ('extract', clip)
+        
+        # Each finished job feeds the next stage's pool
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, item = pending.pop(future)
+                ok, log, result = future.result()
+                print(log)
+                
+                if ok is False:
+                    failed += 1
+                    continue
+                
+                if stage == 'extract':
+                    pipeline_state.mark_done(extract.PIPELINE_STEP, 'done_clip_nums', item.get('clip_number', 0), source)
+                    submit_crop(result)
+                elif ok:
+                    finished += 1
+    
+    print_info(f"Subtitled: {finished} | Failed jobs: {failed}")
+    return failed == 0
+
+# Where each step writes its videos (recorded in the state after the step ran)
+STEP_OUTPUT_DIRS = {
+    3: EXTRACTED_DIR,
+    4: CROPPED_DIR,
+    5: FINAL_DIR,
+}
+
+def record_step_outputs(state, step_num):
+    """Store the .mp4 files a step produced, so the next step's prerequisite check doesn't rescan"""
+    output_dir = STEP_OUTPUT_DIRS.get(step_num)
+    if output_dir is None:
+        return
+    try:
+        with os.scandir(output_dir) as entries:
+            outputs = sorted(entry.name for entry in entries if entry.name.endswith(".mp4") and entry.is_file())
+    except FileNotFoundError:
+        outputs = []
+    state["steps"].setdefault(str(step_num), {})["outputs"] = outputs
+
+def has_step_outputs(state, step_num):
+    """True if step_num produced videos (from the state; directory scan when this run didn't record them)"""
+    recorded = state.get("steps", {}).get(str(step_num), {}).get("outputs")
+    if recorded:
+        return True
+    return find_first_file(STEP_OUTPUT_DIRS[step_num], lambda name: name.endswith(".mp4")) is not None
 
-def check_prerequisites(step_num):
+def check_prerequisites(step_num, state=None):
     """Check if prerequisites for a step are met"""
+    state = state or {}
     if step_num >= 1:
         # Need video file
         VIDEO_FILE = get_video_file()
@@ -219,23 +457,21 @@ def check_prerequisites(step_num):
     
     if step_num >= 4:
         # Need extracted clips
-        extracted_files = list(EXTRACTED_DIR.glob("*.mp4"))
-        if not extracted_files:
+        if not has_step_outputs(state, 3):
             print_error(f"No extracted clips found in {EXTRACTED_DIR}")
             print_info("Run step 3 first")
             return False
     
     if step_num >= 5:
         # Need cropped clips
-        cropped_files = list(CROPPED_DIR.glob("*.mp4"))
-        if not cropped_files:
+        if not has_step_outputs(state, 4):
             print_error(f"No cropped clips found in {CROPPED_DIR}")
             print_info("Run step 4 first")
             return False
     
     return True
 
-def run_pipeline(start_step=1, skip_transcribe=False):
+def run_pipeline(start_step=1, skip_transcribe=False, stream=False, wait_timeout=None, karaoke=False):
     """Run the complete pipeline"""
     
     print_header("🎬 AutoShorts Pipeline 🎬")
@@ -277,8 +513,9 @@ def run_pipeline(start_step=1, skip_transcribe=False):
         },
         {
             "num": 5,
-            "title": "Add Karaoke Subtitles",
+            "title": "Add Subtitles",
             "script": "4_add_subtitles.py",
+            "args": ["--karaoke"] if karaoke else [],
             "description": "Subtitle generation"
         }
     ]
@@ -303,14 +540,35 @@ def run_pipeline(start_step=1, skip_transcribe=False):
         print_step(step_num, step["title"])
         
         # Check prerequisites
-        if not check_prerequisites(step_num):
+        if not check_prerequisites(step_num, state):
             print_error("Prerequisites not met. Pipeline stopped.")
             return False
         
         # Run step
-        if step["script"]:
+        if stream and step_num == 3:
+            # Steps 3-5 together, clip by clip
+            success = run_streaming_steps(karaoke)
+            
+            # Re-read: per-clip progress was recorded in the same file
+            state = load_state()
+            
+            if not success:
+                print_error("Streaming steps 3-5 failed. Pipeline stopped.")
+                print_info("To resume, run: python run_pipeline.py --from-step 3 --stream")
+                save_state(state)
+                return False
+            
+            state["completed_steps"].extend(num for num in (3, 4, 5) if num not in state["completed_steps"])
+            for num in (3, 4, 5):
+                record_step_outputs(state, num)
+            save_state(state)
+            break
+        elif step["script"]:
             # Python script step
-            success = run_script(step["script"], step["description"])
+            success = run_script(step["script"], step["description"], step.get("args", ()))
+            
+            # Re-read: the step script recorded its per-clip progress in the same file
+            state = load_state()
             
             if not success:
                 print_error(f"Step {step_num} failed. Pipeline stopped.")
@@ -320,10 +578,11 @@ def run_pipeline(start_step=1, skip_transcribe=False):
             
             # Mark as completed
             state["completed_steps"].append(step_num)
+            record_step_outputs(state, step_num)
             save_state(state)
         else:
             # External step (AI analysis)
-            success = wait_for_clips_json()
+            success = wait_for_clips_json(wait_timeout)
             
             if not success:
                 print_error("AI analysis step failed or skipped. Pipeline stopped.")
@@ -353,6 +612,7 @@ def run_pipeline(start_step=1, skip_transcribe=False):
     
     # Reset state for next run
     state["completed_steps"] = []
+    state["steps"] = {}
     save_state(state)
     
     return True
@@ -368,6 +628,12 @@ def main():
                         help="Skip transcription step")
     parser.add_argument("--reset", action="store_true",
                         help="Reset pipeline state")
+    parser.add_argument("--wait-timeout", type=float, default=None, metavar="MINUTES",
+                        help="Give up waiting for clips.json after this long; without a terminal on stdin, wait without prompting")
+    parser.add_argument("--stream", action="store_true",
+                        help="Run steps 3-5 concurrently (crop/subtitle each clip as soon as it's ready)")
+    parser.add_argument("--karaoke", action="store_true",
+                        help="Word-by-word karaoke subtitles (slower to render)")
     
     args = parser.parse_args()
     
@@ -385,7 +651,8 @@ def main():
     
     # Run pipeline
     try:
-        success = run_pipeline(start_step=args.from_step, skip_transcribe=args.skip_transcribe)
+        success = run_pipeline(start_step=args.from_step, skip_transcribe=args.skip_transcribe,
+                               stream=args.stream, wait_timeout=args.wait_timeout, karaoke=args.karaoke)
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print()
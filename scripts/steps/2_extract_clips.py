@@ -1,7 +1,13 @@
 import json
+import os
 import subprocess
+from multiprocessing import Pool
 from pathlib import Path
 import re
+from functools import lru_cache
+
+from ffmpeg_utils import FFMPEG, FFPROBE, encoder_name, hwaccel_args, require_ffmpeg, run_ffmpeg, video_encoder_args
+from pipeline_state import get_done, mark_done, output_exists, partial_path, source_signature
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
@@ -11,20 +17,51 @@ OUTPUT_DIR = PROJECT_ROOT / "output"
 CLIPS_DIR = OUTPUT_DIR / "extracted"
 READ_AI_DIR = OUTPUT_DIR / "ai_analysis"
 
-# Find the first video file in the input directory
-VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.m4v']
-video_files = [f for f in INPUT_DIR.iterdir() if f.is_file() and f.suffix.lower() in VIDEO_EXTENSIONS]
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.m4v'})
+CLIPS_JSON = READ_AI_DIR / "clips.json"
 
-if not video_files:
-    raise FileNotFoundError(f"No video files found in {INPUT_DIR}. Supported formats: {', '.join(VIDEO_EXTENSIONS)}")
+# Parallel extraction: each clip is an independent FFmpeg encode.
+# Half the cores as workers, 2 encoder threads each, keeps the CPU busy without oversubscribing it.
+MAX_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+FFMPEG_THREADS = 2
 
-VIDEO_FILE = video_files[0]  # Use the first video file found
-CLIPS_JSON = READ_AI_DIR / "clips.json"
+# Stream-copy clips instead of re-encoding them (only H.264 sources).
+# Cuts stay frame-accurate: only the lead-in before the first keyframe is re-encoded.
+STREAM_COPY = True
+KEYFRAME_TOLERANCE = 0.05  # Seconds - a keyframe this close to the start counts as "on" it
+
+# ffprobe H.264 profile -> libx264 -profile:v. The re-encoded lead-in must match the
+# source's profile/level/pix_fmt: the MP4 only stores the head's SPS/PPS (avcC), and
+# decoders that don't handle in-band parameter set changes glitch at the join otherwise.
+X264_PROFILES = {
+    'constrained baseline': 'baseline',
+    'baseline': 'baseline',
+    'main': 'main',
+    'high': 'high',
+    'high 10': 'high10',
+    'high 4:2:2': 'high422',
+    'high 4:4:4 predictive': 'high444',
+}
+
+PIPELINE_STEP = 3  # Key for per-clip progress in pipeline_state.json
 
-# Create output directory
-CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+# Filename cleanup (compiled once)
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s-]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_ASCII_SPECIAL_CHARS = str.maketrans('', '', ''.join(c for c in map(chr, range(128)) if _SPECIAL_CHARS_RE.match(c)))
 
-print("=== Extracting Video Clips with FFmpeg ===\n")
+# Per-run settings held by each long-lived pool worker (set once by _init_worker)
+_WORKER_STATE = {}
+
+def get_video_file():
+    """Find the first video file in the input directory"""
+    # os.scandir: the extension is checked on the name, no Path/stat() per entry
+    with os.scandir(INPUT_DIR) as entries:
+        for entry in entries:
+            if os.path.splitext(entry.name)[1].lower() in VIDEO_EXTENSIONS and entry.is_file():
+                return Path(entry.path)  # Use the first video file found
+
+    raise FileNotFoundError(f"No video files found in {INPUT_DIR}. Supported formats: {', '.join(sorted(VIDEO_EXTENSIONS))}")
 
 def parse_timestamp(timestamp):
     """Convert timestamp to seconds"""
@@ -33,96 +70,354 @@ def parse_timestamp(timestamp):
 def sanitize_filename(title):
     """Clean title to make it a valid filename"""
     # Remove special characters, keep only alphanumeric, spaces, and hyphens
-    clean = re.sub(r'[^\w\s-]', '', title)
+    # (plain ASCII titles go through str.translate, which runs in C)
+    clean = title.translate(_ASCII_SPECIAL_CHARS) if title.isascii() else _SPECIAL_CHARS_RE.sub('', title)
     # Replace spaces with underscores
-    clean = re.sub(r'\s+', '_', clean)
+    clean = _WHITESPACE_RE.sub('_', clean)
     # Limit length
     return clean[:60]
 
-# Load clips JSON
-print("1. Loading clips data...")
-try:
-    with open(CLIPS_JSON, 'r', encoding='utf-8') as f:
-        clips = json.load(f)
-    print(f"   ✓ Found {len(clips)} clips to extract\n")
-except Exception as e:
-    print(f"   ✗ Error: {e}")
-    exit(1)
+def clip_output_file(clip):
+    """Output path for a clip: clip_NN_<title>.mp4"""
+    clip_num = clip.get('clip_number', 0)
+    safe_title = sanitize_filename(clip.get('title', f'Clip {clip_num}'))
+    return CLIPS_DIR / f"clip_{clip_num:02d}_{safe_title}.mp4"
+
+def run_probe(cmd):
+    """Run an FFprobe command, returning (ok, stdout, stderr)"""
+    result = subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    return result.returncode == 0, result.stdout, result.stderr
+
+def probe_video_codec(video_file):
+    """Return the codec name of the first video stream (e.g. 'h264')"""
+    ok, stdout, _ = run_probe([
+        FFPROBE,
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=codec_name',
+        '-of', 'csv=p=0',
+        str(video_file)
+    ])
+    return stdout.strip() if ok else None
+
+def find_first_keyframe(video_file, start_seconds, end_seconds):
+    """
+    Find the first keyframe at or after start_seconds (and before end_seconds).
+    Only keyframes are decoded (-skip_frame nokey), so this is cheap.
+    Returns the keyframe timestamp or None if the clip contains no keyframe.
+    """
+    ok, stdout, _ = run_probe([
+        FFPROBE,
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-skip_frame', 'nokey',
+        '-read_intervals', f"{start_seconds}%{end_seconds}",
+        '-show_entries', 'frame=best_effort_timestamp_time',
+        '-of', 'csv=p=0',
+        str(video_file)
+    ])
+    if not ok:
+        return None
+
+    for line in stdout.splitlines():
+        try:
+            timestamp = float(line.strip().strip(','))
+        except ValueError:
+            continue
+        if start_seconds - KEYFRAME_TOLERANCE <= timestamp < end_seconds:
+            return timestamp
+    return None
+
+def probe_stream_format(video_file):
+    """(libx264 profile, level, pix_fmt) of the first video stream, or None if unknown or unsupported"""
+    ok, stdout, _ = run_probe([
+        FFPROBE,
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=profile,level,pix_fmt',
+        '-of', 'default=noprint_wrappers=1',
+        str(video_file)
+    ])
+    if not ok:
+        return None
+    fields = dict(line.split('=', 1) for line in stdout.splitlines() if '=' in line)
+    profile = X264_PROFILES.get(fields.get('profile', '').strip().lower())
+    level = fields.get('level', '').strip()
+    pix_fmt = fields.get('pix_fmt', '').strip()
+    if profile is None or not level.isdigit() or not pix_fmt:
+        return None
+    return profile, level, pix_fmt
+
+@lru_cache(maxsize=4)
+def source_stream_format(video_file):
+    """probe_stream_format of the source video, probed once per worker"""
+    return probe_stream_format(video_file)
+
+def encode_args():
+    """Video encoder arguments for the parts that must be re-encoded (NVENC/VideoToolbox/QSV when available)"""
+    return video_encoder_args([
+        '-c:v', 'libx264',  # Video codec
+        '-preset', 'fast',  # Encoding speed
+        '-threads', str(FFMPEG_THREADS),  # Leave cores for the other workers
+    ])
+
+def cut_clip(video_file, start_seconds, end_seconds, output_file, stream_copy=True):
+    """
+    Cut [start_seconds, end_seconds] out of video_file.
+
+    - Start lands on a keyframe: stream-copy the whole clip (no decode/encode)
+    - Start is mid-GOP: re-encode only the lead-in up to the next keyframe
+      (libx264 constrained to the source's profile/level/pix_fmt),
+      stream-copy the rest and join both parts with the concat demuxer
+    - No usable keyframe, non-H.264 source, or a lead-in that doesn't match
+      the source's format: re-encode the whole clip
 
-# Check if video file exists
-if not VIDEO_FILE.exists():
-    print(f"   ✗ Video file not found: {VIDEO_FILE}")
-    exit(1)
+    Audio is always re-encoded in one piece from the source, so it stays
+    continuous across the join. Returns (ok, mode, stderr).
+    """
+    duration = end_seconds - start_seconds
+    audio_args = ['-c:a', 'aac', '-b:a', '192k']
+    output_args = ['-movflags', '+faststart', str(output_file)]
 
-print(f"2. Video file: {VIDEO_FILE}\n")
-print("3. Extracting clips...\n")
+    keyframe = find_first_keyframe(video_file, start_seconds, end_seconds) if stream_copy else None
+
+    def full_reencode():
+        # Full re-encode (original behaviour)
+        cmd = [
+            FFMPEG, '-y',
+            *hwaccel_args(),
+            '-ss', str(start_seconds),  # Start time
+            '-i', str(video_file),  # Input file
+            '-t', str(duration),  # Duration
+            *encode_args(),
+            *audio_args,
+            '-avoid_negative_ts', 'make_zero',  # Fix timestamp issues
+            *output_args
+        ]
+        ok, stderr = run_ffmpeg(cmd)
+        return ok, 're-encode', stderr
+
+    if keyframe is None:
+        return full_reencode()
+
+    if keyframe - start_seconds <= KEYFRAME_TOLERANCE:
+        # Start is already on a keyframe: pure stream copy
+        cmd = [
+            FFMPEG, '-y',
+            '-ss', str(keyframe + 0.001),  # Seek lands exactly on the keyframe
+            '-i', str(video_file),
+            '-t', str(end_seconds - keyframe),
+            '-map', '0:v:0', '-map', '0:a?',
+            '-c:v', 'copy',
+            *audio_args,
+            '-avoid_negative_ts', 'make_zero',
+            *output_args
+        ]
+        ok, stderr = run_ffmpeg(cmd)
+        return ok, 'stream copy', stderr
+
+    source_format = source_stream_format(video_file)
+    if source_format is None:
+        return full_reencode()  # Profile the lead-in can't be matched to
+
+    # Smart cut: re-encode the lead-in GOP, stream-copy from the keyframe on.
+    # MPEG-TS parts keep SPS/PPS in-band so the two encodes can be joined.
+    profile, level, pix_fmt = source_format
+    head_file = output_file.with_suffix('.head.ts')
+    tail_file = output_file.with_suffix('.tail.ts')
+    concat_file = output_file.with_suffix('.concat.txt')
+
+    try:
+        ok, stderr = run_ffmpeg([
+            FFMPEG, '-y',
+            *hwaccel_args(),
+            '-ss', str(start_seconds),
+            '-i', str(video_file),
+            '-t', str(keyframe - start_seconds),
+            '-an',
+            '-c:v', 'libx264',  # Not the hardware encoder: its SPS can't be constrained to the source's
+            '-preset', 'fast',
+            '-profile:v', profile,
+            '-level:v', level,
+            '-pix_fmt', pix_fmt,
+            '-threads', str(FFMPEG_THREADS),
+            str(head_file)
+        ])
+        if not ok:
+            return False, 'smart cut', stderr
+        if probe_stream_format(head_file) != source_format:
+            return full_reencode()
+
+        ok, stderr = run_ffmpeg([
+            FFMPEG, '-y',
+            '-ss', str(keyframe + 0.001),  # Seek lands exactly on the keyframe
+            '-i', str(video_file),
+            '-t', str(end_seconds - keyframe),
+            '-an',
+            '-c:v', 'copy',
+            str(tail_file)
+        ])
+        if not ok:
+            return False, 'smart cut', stderr
+
+        concat_file.write_text(
+            f"file '{head_file.name}'\nfile '{tail_file.name}'\n",
+            encoding='utf-8'
+        )
 
-successful = 0
-failed = 0
+        ok, stderr = run_ffmpeg([
+            FFMPEG, '-y',
+            '-f', 'concat', '-safe', '0', '-i', str(concat_file),
+            '-ss', str(start_seconds), '-t', str(duration), '-i', str(video_file),
+            '-map', '0:v:0', '-map', '1:a?',
+            '-c:v', 'copy',
+            *audio_args,
+            *output_args
+        ])
+        return ok, 'smart cut', stderr
+    finally:
+        for temp_file in (head_file, tail_file, concat_file):
+            temp_file.unlink(missing_ok=True)
 
-for clip in clips:
+def extract_one(clip, video_file, stream_copy=True):
+    """
+    Extract a single clip with FFmpeg (runs in a worker process).
+    Returns (clip_num, ok, log) - log holds the buffered output so parallel
+    workers don't interleave their prints.
+    """
     clip_num = clip.get('clip_number', 0)
     title = clip.get('title', f'Clip {clip_num}')
     start_time = clip.get('start_time', '0:00')
     end_time = clip.get('end_time', '0:00')
-    
+    log = []
+    partial_file = None
+
     try:
         # Parse timestamps
         start_seconds = parse_timestamp(start_time)
         end_seconds = parse_timestamp(end_time)
         duration = end_seconds - start_seconds
-        
-        # Create filename
-        safe_title = sanitize_filename(title)
-        output_file = CLIPS_DIR / f"clip_{clip_num:02d}_{safe_title}.mp4"
-        
-        print(f"   Clip {clip_num}: {title[:50]}...")
-        print(f"   Time: {start_time} → {end_time} ({duration}s)")
-        
-        # FFmpeg command
-        # -ss: start time, -t: duration, -c copy: fast copy without re-encoding
-        # For more precision, we'll re-encode with -c:v libx264 -c:a aac
-        cmd = [
-            'ffmpeg',
-            '-y',  # Overwrite output file
-            '-ss', str(start_seconds),  # Start time
-            '-i', str(VIDEO_FILE),  # Input file
-            '-t', str(duration),  # Duration
-            '-c:v', 'libx264',  # Video codec
-            '-c:a', 'aac',  # Audio codec
-            '-b:a', '192k',  # Audio bitrate
-            '-preset', 'fast',  # Encoding speed
-            '-avoid_negative_ts', 'make_zero',  # Fix timestamp issues
-            str(output_file)
-        ]
-        
-        # Run FFmpeg
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace'
-        )
-        
-        if result.returncode == 0:
-            print(f"   ✓ Saved to: {output_file.name}\n")
-            successful += 1
-        else:
-            print("   ✗ FFmpeg error:")
-            print(f"   {result.stderr[:200]}\n")
-            failed += 1
-            
+
+        # Create filename (encode to .partial/ and move into place when done)
+        output_file = clip_output_file(clip)
+        partial_file = partial_path(output_file)
+
+        log.append(f"   Clip {clip_num}: {title[:50]}...")
+        log.append(f"   Time: {start_time} → {end_time} ({duration}s)")
+
+        ok, mode, stderr = cut_clip(video_file, start_seconds, end_seconds, partial_file, stream_copy)
+
+        if ok:
+            os.replace(partial_file, output_file)
+            log.append(f"   ✓ Saved to: {output_file.name} ({mode})\n")
+            return clip_num, True, '\n'.join(log)
+
+        log.append(f"   ✗ FFmpeg error ({mode}):")
+        log.append(f"   {stderr[-200:]}\n")
+        return clip_num, False, '\n'.join(log)
+
     except Exception as e:
-        print(f"   ✗ Error: {e}\n")
-        failed += 1
-
-print("=" * 50)
-print("\n=== Summary ===")
-print(f"Total clips: {len(clips)}")
-print(f"✓ Successful: {successful}")
-print(f"✗ Failed: {failed}")
-print(f"\nClips saved to: {CLIPS_DIR}")
-
-if successful > 0:
-    print("\n🎬 Ready to upload to TikTok/Instagram/YouTube Shorts!")
+        log.append(f"   ✗ Error: {e}\n")
+        return clip_num, False, '\n'.join(log)
+    finally:
+        if partial_file is not None:
+            partial_file.unlink(missing_ok=True)
+
+def _init_worker(video_file, stream_copy):
+    """Pool initializer: store the run settings once per worker and warm up encoder detection"""
+    _WORKER_STATE['video_file'] = video_file
+    _WORKER_STATE['stream_copy'] = stream_copy
+    encoder_name()  # detect_hw_encoder() is cached per process
+
+def _extract_job(clip):
+    """Pool task: only the clip dict travels to the worker"""
+    return extract_one(clip, _WORKER_STATE['video_file'], _WORKER_STATE['stream_copy'])
+
+def process_one(clip, video_file, stream_copy=True):
+    """Pipeline entry point: extract one clip, returns (ok, log, output_file)"""
+    _, ok, log = extract_one(clip, video_file, stream_copy)
+    return ok, log, clip_output_file(clip)
+
+def progress_source(video_file):
+    """Inputs the per-clip progress is recorded for: a new clips.json or video starts over"""
+    return source_signature(CLIPS_JSON, video_file)
+
+def main():
+    print("=== Extracting Video Clips with FFmpeg ===\n")
+
+    require_ffmpeg()
+    video_file = get_video_file()
+
+    # Create output directory
+    CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Load clips JSON
+    print("1. Loading clips data...")
+    try:
+        with open(CLIPS_JSON, 'r', encoding='utf-8') as f:
+            clips = json.load(f)
+        print(f"   ✓ Found {len(clips)} clips to extract\n")
+    except Exception as e:
+        print(f"   ✗ Error: {e}")
+        exit(1)
+
+    # Check if video file exists
+    if not video_file.exists():
+        print(f"   ✗ Video file not found: {video_file}")
+        exit(1)
+
+    # Resume: skip clips finished by a previous (interrupted) run of the same clips.json and video
+    source = progress_source(video_file)
+    done_clip_nums = get_done(PIPELINE_STEP, 'done_clip_nums', source)
+    pending = [clip for clip in clips
+               if clip.get('clip_number', 0) not in done_clip_nums
+               and not output_exists(clip_output_file(clip))]
+    skipped = len(clips) - len(pending)
+    if skipped:
+        print(f"   ⊗ Skipping {skipped} clip(s) already extracted\n")
+
+    workers = max(1, min(MAX_WORKERS, len(pending)))
+
+    # Stream copy is only safe when the lead-in can be re-encoded to the same codec
+    codec = probe_video_codec(video_file)
+    stream_copy = STREAM_COPY and codec == 'h264'
+    if STREAM_COPY and not stream_copy:
+        print(f"   ⚠ Source codec is {codec or 'unknown'} - falling back to full re-encode\n")
+
+    print(f"2. Video file: {video_file}")
+    print(f"   Encoder: {encoder_name()}\n")
+    print(f"3. Extracting clips ({workers} in parallel)...\n")
+
+    successful = 0
+    failed = 0
+
+    # One long-lived pool for all clips; results stream back as each clip finishes
+    with Pool(processes=workers, initializer=_init_worker, initargs=(video_file, stream_copy)) as pool:
+        for clip_num, ok, log in pool.imap_unordered(_extract_job, pending):
+            print(log)
+            if ok:
+                mark_done(PIPELINE_STEP, 'done_clip_nums', clip_num, source)
+                successful += 1
+            else:
+                failed += 1
+
+    print("=" * 50)
+    print("\n=== Summary ===")
+    print(f"Total clips: {len(clips)}")
+    print(f"✓ Successful: {successful}")
+    print(f"✗ Failed: {failed}")
+    if skipped:
+        print(f"⊗ Already extracted: {skipped}")
+    print(f"\nClips saved to: {CLIPS_DIR}")
+
+    if successful + skipped > 0:
+        print("\n🎬 Ready to upload to TikTok/Instagram/YouTube Shorts!")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,63 @@
+import atexit
+import io
+import os
 import subprocess
+from contextlib import redirect_stdout
+from dataclasses import astuple, dataclass
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-import numpy as np
 import json
-from collections import defaultdict
 import re
+import numpy as np
+
+from ffmpeg_utils import (FFMPEG, FFPROBE, encoder_codec_options, encoder_name, hwaccel_args,
+                          require_ffmpeg, run_ffmpeg, video_encoder_args)
+from pipeline_state import output_exists, partial_path
+
+try:
+    import av  # PyAV (optional): in-process decode/crop/encode
+except ImportError:
+    av = None
+
+try:
+    import fcntl  # Unix: lock the scene cache while workers update it
+except ImportError:
+    fcntl = None
+
+try:
+    import orjson  # Optional: much faster parsing of the (multi-MB) transcripts
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Crop+stack layouts are rendered in-process with PyAV when it's installed
+# (no ffmpeg process/CLI parsing per clip). Grid layouts and 'both scenes'
+# renders, or any PyAV failure, go through the ffmpeg CLI as before.
+AV_ENCODE = True
+
+# Parallel rendering across clips: half the cores as workers, 2 encoder threads
+# each, since one 810x1440 encode can't keep a many-core CPU busy on its own
+MAX_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+FFMPEG_THREADS = 2
+
+# A lone clip (nothing to render alongside it) is encoded as SPLIT_PARTS time ranges
+# by parallel ffmpeg processes, then joined without re-encoding
+SPLIT_PARTS = min(4, MAX_WORKERS)
+SPLIT_MIN_DURATION = 30  # Seconds - shorter clips aren't worth the extra processes
+
+# Without PyAV, reference pixels of more than SAMPLE_BATCH_MIN clips are sampled
+# by one ffmpeg process per SAMPLE_BATCH_SIZE clips instead of one per clip
+SAMPLE_BATCH_MIN = 8
+SAMPLE_BATCH_SIZE = 16  # Each input gets its own decoder inside that process
+
+# Paths
+BASE_DIR = Path(__file__).parent.parent.parent  # Go up three levels: steps -> scripts -> project root
+CANDIDATES_DIR = BASE_DIR / "output" / "extracted"
+CROPPED_DIR = BASE_DIR / "output" / "cropped"
+PROBE_CACHE_FILE = BASE_DIR / "output" / "ai_analysis" / "probe_cache.json"
+SCENE_CACHE_FILE = BASE_DIR / "output" / "ai_analysis" / "scene_cache.json"
+CLIPS_JSON = BASE_DIR / "output" / "ai_analysis" / "clips.json"
 
 # ============= CROP CONFIGURATION =============
 # Adjust these values to match your podcast camera setup
@@ -142,41 +196,162 @@ AUTO_DETECT = {
 }
 # ==========================================================
 
-def extract_frame(video_path, time_sec=5):
-    """Extract a frame from the video at specified time"""
-    cmd = [
-        'ffmpeg',
-        '-i', str(video_path),
-        '-ss', str(time_sec),
-        '-vframes', '1',
-        '-f', 'image2pipe',
-        '-pix_fmt', 'bgr24',
-        '-vcodec', 'rawvideo',
-        '-'
-    ]
-    
+def sample_pixel_av(video_path, x, y, time_sec=5):
+    """
+    BGR color of pixel (x, y) in the keyframe at/just before time_sec, decoded in-process with PyAV.
+    No ffmpeg/ffprobe subprocesses, and non-keyframes are never decoded.
+    """
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        stream.codec_context.skip_frame = 'NONKEY'
+        container.seek(int(time_sec * av.time_base))  # Container seek is in AV_TIME_BASE units
+        frame = next(container.decode(stream))
+        if x >= frame.width or y >= frame.height:
+            raise ValueError(f"reference pixel ({x}, {y}) is outside the {frame.width}x{frame.height} frame")
+        
+        # Read the 3 bytes straight from the converted plane (rows are line_size apart)
+        plane = frame.reformat(format='bgr24').planes[0]
+        offset = y * plane.line_size + x * 3
+        return tuple(memoryview(plane)[offset:offset + 3])
+
+@dataclass(frozen=True)
+class VideoInfo:
+    """ffprobe metadata of a video (first video stream)"""
+    width: int
+    height: int
+    duration: float
+    fps: float
+
+def _load_probe_cache():
+    """Read the persisted probe results ([[path, size, mtime], [width, height, duration, fps]] entries)"""
+    try:
+        with open(PROBE_CACHE_FILE, 'rb') as f:
+            return {tuple(key): VideoInfo(*info) for key, info in _loads(f.read())}
+    except (OSError, ValueError, TypeError):
+        return {}
+
+# Probe results keyed by (path, size, mtime): a changed file gets probed again
+_PROBE_CACHE = _load_probe_cache()
+_PROBE_CACHE_STATE = {'changed': False}
+
+@atexit.register
+def _save_probe_cache():
+    """Persist the probe cache next to clips.json for the next run (dropping files that no longer exist)"""
+    if not _PROBE_CACHE_STATE['changed']:
+        return
+    entries = [[list(key), list(astuple(info))] for key, info in _PROBE_CACHE.items() if os.path.exists(key[0])]
+    try:
+        PROBE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = PROBE_CACHE_FILE.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(temp_file, PROBE_CACHE_FILE)
+    except OSError:
+        pass  # Only a cache
+
+def _parse_rate(rate):
+    """'30000/1001' -> 29.97 (0.0 if unknown)"""
+    num, _, den = rate.partition('/')
     try:
-        result = subprocess.run(cmd, capture_output=True, check=True)
-        # Get video dimensions
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+def probe_video(video_path):
+    """
+    Width, height, duration and fps of a video as a VideoInfo, or None if ffprobe fails.
+    One ffprobe call per file version, cached in memory and in PROBE_CACHE_FILE.
+    """
+    st = os.stat(video_path)
+    key = (str(video_path), st.st_size, int(st.st_mtime))
+    
+    info = _PROBE_CACHE.get(key)
+    if info is None:
         probe_cmd = [
-            'ffprobe',
+            FFPROBE,
             '-v', 'error',
             '-select_streams', 'v:0',
-            '-show_entries', 'stream=width,height',
-            '-of', 'csv=p=0',
+            '-show_entries', 'stream=width,height,r_frame_rate:format=duration',
+            '-of', 'json',
             str(video_path)
         ]
-        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True)
-        width, height = map(int, probe_result.stdout.strip().split(','))
-        
-        # Decode the raw video frame
-        frame = np.frombuffer(result.stdout, dtype=np.uint8)
-        frame = frame.reshape((height, width, 3))
-        
-        return frame
-    except Exception as e:
-        print(f"Error extracting frame: {e}")
+        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True)
+        try:
+            probe = json.loads(probe_result.stdout)
+            stream = probe['streams'][0]
+            duration = probe.get('format', {}).get('duration', '')
+            info = VideoInfo(
+                width=int(stream['width']),
+                height=int(stream['height']),
+                duration=float(duration) if duration not in ('', 'N/A') else 0.0,
+                fps=_parse_rate(stream.get('r_frame_rate', '')),
+            )
+        except (ValueError, KeyError, IndexError, TypeError):
+            return None
+        _PROBE_CACHE[key] = info
+        _PROBE_CACHE_STATE['changed'] = True
+    
+    return info
+
+def sample_pixel(video_path, x, y, time_sec=5):
+    """BGR color of pixel (x, y) at time_sec, or None if it can't be read"""
+    if av is not None:
+        try:
+            return sample_pixel_av(video_path, x, y, time_sec)
+        except Exception as e:
+            print(f"  ⚠ PyAV decode failed ({e}), falling back to ffmpeg")
+    
+    info = probe_video(video_path)
+    if info is not None and (x >= info.width or y >= info.height):
+        print(f"  ⚠ Reference pixel position ({x}, {y}) is out of bounds for {info.width}x{info.height}")
+        return None
+    
+    # Crop to the single pixel inside ffmpeg: only 3 bytes come back through the pipe
+    cmd = [
+        FFMPEG,
+        '-v', 'error',
+        '-ss', str(time_sec),  # Input seek: jump to the nearest keyframe instead of decoding from 0
+        '-i', str(video_path),
+        '-frames:v', '1',
+        '-vf', f"format=bgr24,crop=1:1:{x}:{y}",  # Convert first so the crop isn't rounded to chroma blocks
+        '-f', 'rawvideo',
+        '-pix_fmt', 'bgr24',
+        '-'
+    ]
+    
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0 or len(result.stdout) < 3:
+        print(f"Error sampling pixel: {result.stderr.decode('utf-8', 'replace').strip()[-200:]}")
+        return None
+    
+    return tuple(result.stdout[:3])
+
+def sample_pixels_batch(video_files, x, y, time_sec=5):
+    """
+    BGR color of pixel (x, y) at time_sec for several videos with a single ffmpeg process:
+    every input is seeked, cropped to 1×1 and the pixels are hstack'ed into one N×1 frame.
+    Returns the list of colors, or None if the batch failed (sample each video on its own then).
+    """
+    cmd = [FFMPEG, '-v', 'error']
+    for video_file in video_files:
+        cmd += ['-ss', str(time_sec), '-i', str(video_file)]
+    
+    pixels = [f"[{i}:v]format=bgr24,crop=1:1:{x}:{y},setpts=PTS-STARTPTS[p{i}]" for i in range(len(video_files))]
+    stack = ''.join(f"[p{i}]" for i in range(len(video_files))) + f"hstack=inputs={len(video_files)}[out]"
+    cmd += [
+        '-filter_complex', ';'.join(pixels) + ';' + stack,
+        '-map', '[out]',
+        '-frames:v', '1',
+        '-f', 'rawvideo',
+        '-pix_fmt', 'bgr24',
+        '-'
+    ]
+    
+    result = subprocess.run(cmd, capture_output=True)
+    size = 3 * len(video_files)
+    if result.returncode != 0 or len(result.stdout) < size:
         return None
+    return [tuple(result.stdout[i:i + 3]) for i in range(0, size, 3)]
 
 def get_auto_detect_config(num_speakers):
     override = AUTO_DETECT.get('by_num_speakers', {}).get(num_speakers, {})
@@ -185,73 +360,223 @@ def get_auto_detect_config(num_speakers):
     merged.update(override)
     return merged
 
-def detect_crop_mode(video_file, num_speakers):
-    """Automatically detect which scene type: 'speakers' or 'content'"""
+def classify_scene_colors(pixel_colors, detect_cfg):
+    """
+    Classify N sampled reference colors in one vectorized pass.
+    Returns (scenes, dist_speakers, dist_content): a scene is 'speakers', 'content'
+    or None (no match within tolerance), distances are squared.
+    """
+    samples = np.asarray(pixel_colors, dtype=np.int32).reshape(-1, 3)  # Signed: uint8 would wrap on subtraction
+    refs = np.array([detect_cfg['speakers_color'], detect_cfg['content_color']], dtype=np.int32)
+    
+    # (N, 2) squared distances of every sample to every reference color, one reduction
+    diff = samples[:, None, :] - refs[None, :, :]
+    dist_sq = np.einsum('nrc,nrc->nr', diff, diff)
+    dist_speakers, dist_content = dist_sq[:, 0], dist_sq[:, 1]
+    
+    # Closer scene wins, but only within tolerance (compared squared, no sqrt)
+    tolerance_sq = detect_cfg['tolerance'] ** 2
+    is_speakers = (dist_speakers < dist_content) & (dist_speakers < tolerance_sq)
+    is_content = (dist_content < dist_speakers) & (dist_content < tolerance_sq)
+    scenes = ['speakers' if speakers else 'content' if content else None
+              for speakers, content in zip(is_speakers.tolist(), is_content.tolist())]
+    return scenes, dist_speakers.tolist(), dist_content.tolist()
+
+def detect_crop_modes(video_files, num_speakers):
+    """
+    Automatically detect the scene type ('speakers' or 'content') of several videos:
+    one reference pixel is sampled per video and all of them are classified at once.
+    A scene_type given in clips.json wins, then scenes detected by an earlier run;
+    new detections are saved in SCENE_CACHE_FILE.
+    Returns [(scene_type or None, log)] in video order, log holding what to print for it.
+    """
     if not AUTO_DETECT['enabled']:
-        return None  # Manual mode
+        return [(None, '') for _ in video_files]  # Manual mode
+
+    # Known from an earlier run: no frame to decode
+    known = {}
+    scene_cache = _load_scene_cache()
+    for video_file in video_files:
+        scene_type = clip_scene_type(video_file)
+        if scene_type is not None:
+            known[video_file] = (scene_type, f"  🎯 {scene_type.upper()} scene (from clips.json)\n")
+            continue
+        scene_type = cached_scene_type(scene_cache, video_file, num_speakers)
+        if scene_type is not None:
+            known[video_file] = (scene_type, f"  🎯 Auto-detected: {scene_type.upper()} scene (cached)\n")
+    all_files, video_files = video_files, [video_file for video_file in video_files if video_file not in known]
 
     detect_cfg = get_auto_detect_config(num_speakers)
-    
-    # Extract a frame
-    frame = extract_frame(video_file, time_sec=5)
-    if frame is None:
-        print("  ⚠ Could not extract frame for auto-detection")
-        return None
-    
-    # Get pixel color at reference position
     x, y = detect_cfg['pixel_position']
-    if y >= frame.shape[0] or x >= frame.shape[1]:
-        print(f"  ⚠ Reference pixel position ({x}, {y}) is out of bounds")
-        return None
-    
-    pixel_color = frame[y, x]
     
-    # Calculate color distance to each scene's reference color
-    speakers_color = np.array(detect_cfg['speakers_color'])
-    content_color = np.array(detect_cfg['content_color'])
+    # Many clips and no PyAV: one ffmpeg per batch of clips instead of one per clip
+    batched = {}
+    if av is None and len(video_files) > SAMPLE_BATCH_MIN:
+        for start in range(0, len(video_files), SAMPLE_BATCH_SIZE):
+            batch = video_files[start:start + SAMPLE_BATCH_SIZE]
+            batch_colors = sample_pixels_batch(batch, x, y, time_sec=5) if len(batch) > 1 else None
+            if batch_colors is not None:
+                batched.update(zip(batch, batch_colors))
     
-    dist_speakers = np.linalg.norm(pixel_color - speakers_color)
-    dist_content = np.linalg.norm(pixel_color - content_color)
+    # Get pixel color at reference position (sampling messages kept with their video)
+    colors, logs = [], []
+    for video_file in video_files:
+        log = io.StringIO()
+        with redirect_stdout(log):
+            if video_file in batched:
+                pixel_color = batched[video_file]
+            else:
+                pixel_color = sample_pixel(video_file, x, y, time_sec=5)
+            if pixel_color is None:
+                print(f"  ⚠ Could not read reference pixel ({x}, {y}) for auto-detection")
+        colors.append(pixel_color)
+        logs.append(log)
     
-    # Determine which scene is closer
-    if dist_speakers < dist_content and dist_speakers < detect_cfg['tolerance']:
-        detected_scene = 'speakers'
-    elif dist_content < dist_speakers and dist_content < detect_cfg['tolerance']:
-        detected_scene = 'content'
-    else:
-        print(f"  ⚠ Pixel color {tuple(pixel_color)} doesn't match either scene")
-        print(f"     Distance to speakers: {dist_speakers:.1f}, Distance to content: {dist_content:.1f}")
-        return None
+    sampled = [color for color in colors if color is not None]
+    classified = iter(zip(*classify_scene_colors(sampled, detect_cfg)) if sampled else ())
     
-    print(f"  🎯 Auto-detected: {detected_scene.upper()} scene")
-    print(f"     Pixel at ({x}, {y}) = {tuple(pixel_color)}")
+    results = []
+    for pixel_color, log in zip(colors, logs):
+        detected_scene = None
+        if pixel_color is not None:
+            detected_scene, dist_speakers, dist_content = next(classified)
+            with redirect_stdout(log):
+                if detected_scene is None:
+                    print(f"  ⚠ Pixel color {pixel_color} doesn't match either scene")
+                    print(f"     Distance to speakers: {dist_speakers ** 0.5:.1f}, Distance to content: {dist_content ** 0.5:.1f}")
+                else:
+                    print(f"  🎯 Auto-detected: {detected_scene.upper()} scene")
+                    print(f"     Pixel at ({x}, {y}) = {pixel_color}")
+        results.append((detected_scene, log.getvalue()))
     
+    save_scene_types({video_file: scene for video_file, (scene, _) in zip(video_files, results) if scene is not None},
+                     num_speakers)
+    known.update(zip(video_files, results))
+    return [known[video_file] for video_file in all_files]
+
+def detect_crop_mode(video_file, num_speakers):
+    """Automatically detect which scene type: 'speakers' or 'content'"""
+    detected_scene, log = detect_crop_modes([video_file], num_speakers)[0]
+    print(log, end='')
     return detected_scene
 
+@lru_cache(maxsize=4)
+def _transcript_index(transcripts_dir, dir_mtime):
+    """{video base name: transcript path} for every *_transcript.json (listed once per directory version)"""
+    return {path.name[:-len("_transcript.json")]: path for path in transcripts_dir.glob("*_transcript.json")}
+
 def find_transcript_for_clip(clip_file, base_dir):
     """Find the matching transcript JSON for a given clip file"""
     transcripts_dir = base_dir / "output" / "transcripts"
+    try:
+        index = _transcript_index(transcripts_dir, os.stat(transcripts_dir).st_mtime_ns)
+    except OSError:
+        return None
     
     # Extract the base name (without clip number and suffix)
     # e.g., "video_clip_001.mp4" -> "video"
     clip_base = clip_file.stem.rsplit('_clip_', 1)[0] if '_clip_' in clip_file.stem else clip_file.stem
     
     # Look for matching transcript
-    possible_transcripts = [
-        transcripts_dir / f"{clip_base}_transcript.json",
-        transcripts_dir / f"{clip_base.lower()}_transcript.json",
-    ]
-    
-    # Also check for any transcript files
-    for transcript_file in transcripts_dir.glob("*_transcript.json"):
-        if transcript_file not in possible_transcripts:
-            possible_transcripts.append(transcript_file)
+    transcript_path = index.get(clip_base) or index.get(clip_base.lower())
+    if transcript_path is not None:
+        return transcript_path
     
-    for transcript_path in possible_transcripts:
-        if transcript_path.exists():
-            return transcript_path
+    # Otherwise any transcript (single-episode runs)
+    return next(iter(index.values()), None)
+
+_CLIP_RE = re.compile(r'clip_(\d+)')
+_TIME_RE = re.compile(r'(?:(\d+):)?(\d+):(\d+(?:\.\d+)?)')  # [HH:]MM:SS[.ms]
+
+def parse_time(value):
+    """Seconds from a clips.json timestamp: seconds (number or string), MM:SS or HH:MM:SS"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _TIME_RE.fullmatch(value.strip())
+    if match is None:
+        return float(value)
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+
+@lru_cache(maxsize=1)
+def _load_clips_index(clips_json_path, mtime):
+    """
+    {clip_number: (start_seconds, end_seconds, scene_type or None)} from clips.json,
+    parsed once per file version. scene_type is optional clip metadata.
+    """
+    with open(clips_json_path, 'rb') as f:
+        clips_data = _loads(f.read())
     
-    return None
+    index = {}
+    for clip in clips_data:
+        # The first entry wins for duplicate clip numbers
+        index.setdefault(clip.get('clip_number'), (parse_time(clip.get('start_time', 0)),
+                                                   parse_time(clip.get('end_time', 0)),
+                                                   clip.get('scene_type')))
+    return index
+
+def clip_number_of(clip_file):
+    """Clip number from the filename (e.g., "clip_01_title.mp4" -> 1), or None"""
+    match = _CLIP_RE.search(clip_file.stem)
+    return int(match.group(1)) if match else None
+
+def clip_scene_type(clip_file):
+    """Scene type ('speakers' or 'content') given for this clip in clips.json, or None"""
+    clip_number = clip_number_of(clip_file)
+    if clip_number is None:
+        return None
+    try:
+        entry = _load_clips_index(CLIPS_JSON, os.stat(CLIPS_JSON).st_mtime_ns).get(clip_number)
+    except Exception:
+        return None
+    return entry[2] if entry is not None and entry[2] in ('speakers', 'content') else None
+
+def _scene_cache_key(clip_file, num_speakers):
+    """Cache key of a clip version: (path, size, mtime, num_speakers) - the reference pixel depends on num_speakers"""
+    st = os.stat(clip_file)
+    return (str(clip_file), st.st_size, int(st.st_mtime), num_speakers)
+
+def _load_scene_cache():
+    """Read the saved detections ([[path, size, mtime, num_speakers], scene_type] entries)"""
+    try:
+        with open(SCENE_CACHE_FILE, 'rb') as f:
+            return {tuple(key): scene_type for key, scene_type in _loads(f.read())}
+    except (OSError, ValueError, TypeError):
+        return {}
+
+def cached_scene_type(scene_cache, clip_file, num_speakers):
+    """Scene type auto-detected for this version of the clip by an earlier run (from _load_scene_cache), or None"""
+    try:
+        scene_type = scene_cache.get(_scene_cache_key(clip_file, num_speakers))
+    except OSError:
+        return None
+    return scene_type if scene_type in ('speakers', 'content') else None
+
+def save_scene_types(scene_types, num_speakers):
+    """
+    Store auto-detected scene types ({clip_file: scene_type}) in SCENE_CACHE_FILE (atomic write),
+    dropping files that no longer exist. clips.json itself is never rewritten.
+    The read-modify-write holds an exclusive lock on a sidecar file where fcntl exists,
+    so parallel pipeline workers don't drop each other's entries (unlocked on Windows).
+    """
+    if not scene_types:
+        return
+    try:
+        SCENE_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(SCENE_CACHE_FILE.with_suffix('.lock'), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # Released when the file is closed
+            cache = _load_scene_cache()
+            for clip_file, scene_type in scene_types.items():
+                cache[_scene_cache_key(clip_file, num_speakers)] = scene_type
+            entries = [[list(key), scene_type] for key, scene_type in cache.items() if os.path.exists(key[0])]
+            
+            temp_file = SCENE_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(temp_file, SCENE_CACHE_FILE)
+    except OSError:
+        pass  # Only a cache
 
 def get_clip_timestamps(clip_file, base_dir):
     """
@@ -265,139 +590,80 @@ def get_clip_timestamps(clip_file, base_dir):
         return None
     
     # Extract clip number from filename (e.g., "clip_01_title.mp4" -> 1)
-    match = re.search(r'clip_(\d+)', clip_file.stem)
-    if not match:
+    clip_number = clip_number_of(clip_file)
+    if clip_number is None:
         print(f"  ⚠️ Could not extract clip number from {clip_file.name}")
         return None
     
-    clip_number = int(match.group(1))
-    
     try:
-        with open(clips_json_path, 'r', encoding='utf-8') as f:
-            clips_data = json.load(f)
-        
-        # Find the matching clip
-        for clip in clips_data:
-            if clip.get('clip_number') == clip_number:
-                start_time_str = clip.get('start_time', 0)
-                end_time_str = clip.get('end_time', 0)
-                
-                # Convert to float (timestamps are now in seconds)
-                start_seconds = float(start_time_str)
-                end_seconds = float(end_time_str)
-                
-                return (start_seconds, end_seconds)
-        
-        print(f"  ⚠️ Clip {clip_number} not found in clips.json")
-        return None
-        
+        clips_index = _load_clips_index(clips_json_path, os.stat(clips_json_path).st_mtime_ns)
     except Exception as e:
         print(f"  ⚠️ Error reading clips.json: {e}")
         return None
+    
+    # Find the matching clip
+    entry = clips_index.get(clip_number)
+    if entry is None:
+        print(f"  ⚠️ Clip {clip_number} not found in clips.json")
+        return None
+    return entry[:2]
 
 def analyze_speaker_timeline(transcript_path, clip_start, clip_end):
     """
     Analyze the transcript to determine which speaker is talking at each time
     Returns a list of (start_time, end_time, speaker_id) tuples
     """
-    with open(transcript_path, 'r', encoding='utf-8') as f:
-        transcript_data = json.load(f)
+    with open(transcript_path, 'rb') as f:
+        transcript_data = _loads(f.read())
     
-    # Build speaker timeline from word-level timestamps
-    speaker_segments = []
-    current_speaker = None
-    segment_start = None
+    # Flatten the word-level timestamps into arrays (speakers encoded as int ids)
+    words = [word for segment in transcript_data.get('segments', []) for word in segment.get('words', [])]
+    if not words:
+        return []
     
-    for segment in transcript_data.get('segments', []):
-        for word in segment.get('words', []):
-            word_start = word.get('start', 0)
-            word_end = word.get('end', 0)
-            speaker = word.get('speaker', 'UNKNOWN')
-            
-            # Filter to clip time range
-            if word_end < clip_start or word_start > clip_end:
-                continue
-            
-            # Adjust times relative to clip
-            adjusted_start = max(word_start - clip_start, 0)
-            
-            if speaker != current_speaker:
-                # Save previous segment if exists
-                if current_speaker is not None and segment_start is not None:
-                    speaker_segments.append((segment_start, adjusted_start, current_speaker))
-                
-                # Start new segment
-                current_speaker = speaker
-                segment_start = adjusted_start
+    starts = np.fromiter((word.get('start', 0) for word in words), dtype=float, count=len(words))
+    ends = np.fromiter((word.get('end', 0) for word in words), dtype=float, count=len(words))
+    speaker_names, speaker_ids = np.unique([word.get('speaker', 'UNKNOWN') for word in words], return_inverse=True)
+    
+    # Filter to clip time range, times relative to clip
+    in_clip = (ends >= clip_start) & (starts <= clip_end)
+    if not in_clip.any():
+        return []
+    starts = np.maximum(starts[in_clip] - clip_start, 0)
+    speaker_ids = speaker_ids[in_clip]
     
-    # Add final segment
-    if current_speaker is not None and segment_start is not None:
-        speaker_segments.append((segment_start, clip_end - clip_start, current_speaker))
+    # A new segment starts at every speaker change and ends where the next one starts
+    changes = np.flatnonzero(speaker_ids[1:] != speaker_ids[:-1]) + 1
+    first_words = np.concatenate(([0], changes))
+    segment_starts = starts[first_words]
+    segment_ends = np.append(starts[changes], clip_end - clip_start)
     
-    return speaker_segments
+    return list(zip(segment_starts.tolist(), segment_ends.tolist(), speaker_names[speaker_ids[first_words]].tolist()))
 
 def calculate_speaker_activity(speaker_timeline, num_speakers, speaker_mapping):
     """
     Calculate how much each speaker talks in the clip
     Returns list of speaker IDs sorted by talk time (descending)
     """
-    talk_time = defaultdict(float)
-    
-    # Calculate total talk time for each speaker
-    for start_time, end_time, speaker_id in speaker_timeline:
-        duration = end_time - start_time if end_time != float('inf') else 0
-        talk_time[speaker_id] += duration
-    
-    # Get all speakers from mapping
+    # Get all speakers from mapping, encoded as int ids
     all_speakers = sorted(speaker_mapping.keys())
+    speaker_index = {speaker: i for i, speaker in enumerate(all_speakers)}
     
-    # Sort speakers by talk time (descending)
-    sorted_speakers = sorted(all_speakers, key=lambda s: talk_time.get(s, 0), reverse=True)
-    
-    return sorted_speakers, talk_time
-
-def select_speakers_to_show(speaker_timeline, num_speakers, speakers_shown=3):
-    """
-    Determine which speakers to show at each point in time
-    Returns list of (start_time, end_time, [speaker_ids]) tuples
-    """
-    if num_speakers <= speakers_shown:
-        # Show all speakers all the time
-        all_speakers = set()
-        for _, _, speaker in speaker_timeline:
-            all_speakers.add(speaker)
-        return [(0, float('inf'), sorted(list(all_speakers)))]
-    
-    display_segments = []
-    current_speakers = []
-    segment_start = 0
-    recent_speakers = []  # Track recently active speakers
-    
-    for seg_start, seg_end, active_speaker in speaker_timeline:
-        # Determine which speakers to show
-        # Priority: active speaker + most recent other speakers
-        if active_speaker not in recent_speakers:
-            recent_speakers.insert(0, active_speaker)
-        else:
-            # Move to front if already in list
-            recent_speakers.remove(active_speaker)
-            recent_speakers.insert(0, active_speaker)
-        
-        # Select top N speakers
-        selected = recent_speakers[:speakers_shown]
-        
-        # If selection changed, create new segment
-        if selected != current_speakers:
-            if current_speakers:
-                display_segments.append((segment_start, seg_start, current_speakers.copy()))
-            current_speakers = selected.copy()
-            segment_start = seg_start
+    # Calculate total talk time for each speaker (speakers outside the mapping are ignored)
+    timeline = [(start_time, end_time, speaker_index[speaker_id])
+                for start_time, end_time, speaker_id in speaker_timeline if speaker_id in speaker_index]
+    if timeline:
+        starts, ends, ids = (np.array(column) for column in zip(*timeline))
+        durations = np.where(np.isinf(ends), 0, ends - starts)
+        totals = np.bincount(ids.astype(np.intp), weights=durations, minlength=len(all_speakers))
+    else:
+        totals = np.zeros(len(all_speakers))
     
-    # Add final segment
-    if current_speakers:
-        display_segments.append((segment_start, float('inf'), current_speakers))
+    # Sort speakers by talk time (descending, ties keep the mapping order)
+    sorted_speakers = [all_speakers[i] for i in np.argsort(-totals, kind='stable')]
+    talk_time = dict(zip(all_speakers, totals.tolist()))
     
-    return display_segments
+    return sorted_speakers, talk_time
 
 def get_speaker_positions(num_speakers):
     """Get the crop positions for speakers scene based on number of speakers"""
@@ -426,6 +692,580 @@ def prompt_num_speakers():
         else:
             print("  ⚠️ Please enter 3, 4, or 5")
 
+def crop_filter(region):
+    """FFmpeg crop filter for one configured region"""
+    return f"crop={region['width']}:{region['height']}:{region['x']}:{region['y']}"
+
+def scene_regions(num_speakers, scene_type):
+    """Configured crop regions of a scene as a tuple (a single content crop is a 1-tuple)"""
+    regions = CROP_CONFIGS.get(num_speakers, {}).get(scene_type) or ()
+    return (regions,) if isinstance(regions, dict) else tuple(regions)
+
+def build_crop_filters():
+    """
+    Crop filter text for every configured position, keyed by num_speakers and
+    scene type: CROP_FILTERS[num_speakers][scene_type][position index].
+    """
+    crop_filters = {}
+    for num_speakers, crop_config in CROP_CONFIGS.items():
+        crop_filters[num_speakers] = {}
+        for scene_type in crop_config:
+            crop_filters[num_speakers][scene_type] = [crop_filter(region) for region in scene_regions(num_speakers, scene_type)]
+    return crop_filters
+
+# Built once at load - CROP_CONFIGS doesn't change at runtime
+CROP_FILTERS = build_crop_filters()
+
+def split_input(count):
+    """Explicit split of the decoded input into [s0]..[s{count-1}] (frames are shared, not copied)"""
+    return f"[0:v]split={count}" + ''.join(f"[s{i}]" for i in range(count))
+
+def vertical_layout(count):
+    """xstack layout placing count inputs top to bottom: 0_0|0_h0|0_h0+h1|..."""
+    return '|'.join(f"0_{'+'.join(f'h{j}' for j in range(i)) or 0}" for i in range(count))
+
+def stack_size(regions):
+    """(width, height) of the frame the vertical xstack of regions produces"""
+    return max(r['width'] for r in regions), sum(r['height'] for r in regions)
+
+@lru_cache(maxsize=64)
+def build_crop_vstack(crops):
+    """
+    Filter graph template: split the input, apply each crop filter to one branch
+    and stack them vertically with one xstack. Only the crop coordinates change
+    between layouts/videos. crops is a tuple of crop filters, so each layout is
+    assembled once and memoized.
+    """
+    if len(crops) == 1:
+        return f"[0:v]{crops[0]}[out]"
+
+    crop_chains = [f"[s{i}]{crop}[v{i}]" for i, crop in enumerate(crops)]
+    # fill: narrower crops leave black margins (the frame is as wide as the widest crop)
+    stack = ''.join(f"[v{i}]" for i in range(len(crops))) + f"xstack=inputs={len(crops)}:layout={vertical_layout(len(crops))}:fill=black[out]"
+    return ';'.join([split_input(len(crops)), *crop_chains, stack])
+
+# Tile filters, {w}×{h} is the tile size
+FILL_TILE = 'scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h},setsar=1'  # Allow stretch to fill
+FIT_TILE = ('crop=iw*8/9:ih:(iw-iw*8/9)/2:0,scale={w}:{h}:force_original_aspect_ratio=decrease,'
+            'pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1')  # Crop to 8:9 from center, preserve aspect, pad (no stretch)
+
+# Grid layouts by number of speakers, target 1080×1920 vertical video.
+# 'grid' has one (tile filter, width, height, row) entry per speaker crop, in crop order;
+# tiles of a row are placed left to right, 'stack' lists the rows top to bottom.
+LAYOUTS = {
+    # 2×2+1: top/middle rows are 540×640 tiles, the least active speaker gets a 1080×640 bottom row
+    5: {
+        'grid': [
+            (FILL_TILE, 540, 640, 'top'),
+            (FILL_TILE, 540, 640, 'top'),
+            (FILL_TILE, 540, 640, 'mid'),
+            (FILL_TILE, 540, 640, 'mid'),
+            (FIT_TILE, 1080, 640, 'bottom'),
+        ],
+        'stack': ['top', 'mid', 'bottom'],
+    },
+}
+
+def build_layout(layout):
+    """
+    Tile part of a grid graph generated from a LAYOUTS entry, as (tile filters, stack):
+    the filter that scales each tile to its exact size (appended to that tile's crop),
+    and the single xstack placing [t0]..[tN] (no intermediate row frames).
+    """
+    # Top-left corner of every tile: rows stack by their tallest tile
+    row_y = {}
+    y = 0
+    for row in layout['stack']:
+        row_y[row] = y
+        y += max(height for _, _, height, tile_row in layout['grid'] if tile_row == row)
+    row_x = dict.fromkeys(layout['stack'], 0)
+    
+    tile_filters, positions = [], []
+    for tile, width, height, row in layout['grid']:
+        tile_filters.append(tile.format(w=width, h=height))
+        positions.append(f"{row_x[row]}_{row_y[row]}")
+        row_x[row] += width
+    
+    tiles = ''.join(f"[t{i}]" for i in range(len(positions)))
+    return tile_filters, f"{tiles}xstack=inputs={len(positions)}:layout={'|'.join(positions)}:fill=black[out]"
+
+# Built once at load - LAYOUTS doesn't change at runtime
+LAYOUT_GRAPHS = {num_speakers: build_layout(layout) for num_speakers, layout in LAYOUTS.items()}
+
+@lru_cache(maxsize=64)
+def build_grid(crops, num_speakers):
+    """
+    Filter graph for a grid layout: split the input, then one crop (from the crops tuple)
+    + tile scaling chain per tile, all placed by the layout's xstack.
+    """
+    tile_filters, stack = LAYOUT_GRAPHS[num_speakers]
+    tile_chains = [f"[s{i}]{crop},{tile}[t{i}]" for i, (crop, tile) in enumerate(zip(crops, tile_filters))]
+    return ';'.join([split_input(len(tile_chains)), *tile_chains, stack])
+
+def pick_crops(scene_crops, positions, count):
+    """
+    count crops (filters or regions) for the given positions: positions without a configured
+    crop are skipped and the missing tiles are filled from the configured crops in order.
+    """
+    crops = [scene_crops[pos] for pos in positions[:count] if pos < len(scene_crops)]
+    if scene_crops:
+        crops += [scene_crops[i % len(scene_crops)] for i in range(len(crops), count)]
+    return tuple(crops)
+
+def build_static_filters():
+    """
+    (filter graph, stacked regions) for the layouts that don't depend on the transcript
+    (single content crop, first 3 positions), keyed by (num_speakers, scene_type).
+    """
+    static_filters = {}
+    for num_speakers, scene_crops in CROP_FILTERS.items():
+        for scene_type, count in (('content', 3), ('speakers', min(num_speakers, 3))):
+            if scene_crops.get(scene_type):
+                static_filters[(num_speakers, scene_type)] = (
+                    build_crop_vstack(tuple(scene_crops[scene_type][:count])),
+                    scene_regions(num_speakers, scene_type)[:count]
+                )
+    return static_filters
+
+STATIC_FILTERS = build_static_filters()
+
+def get_clip_time_range(video_file, base_dir):
+    """Original (start, end) of the clip in the source video, falling back to the clip duration"""
+    # Get original timestamps from clips.json
+    timestamps = get_clip_timestamps(video_file, base_dir)
+
+    if timestamps is not None:
+        return timestamps
+
+    # Fallback: use clip duration
+    print("  ⚠️ Using clip duration as fallback (timestamps not found)")
+    info = probe_video(video_file)
+    clip_end = info.duration if info is not None and info.duration > 0 else 60
+    return 0, clip_end
+
+def _static_vstack(num_speakers, scene_type, reason):
+    """Fallback: the precomputed graph showing the first 3 positions of a scene"""
+    layout = " in content layout" if scene_type == 'content' else ""
+    print(f"  ⚠️ {reason} - showing first 3 speakers{layout}")
+    return STATIC_FILTERS[(num_speakers, scene_type)]
+
+def _print_regions(regions, layout=""):
+    print(f"  Showing {len(regions)} speaker(s){layout}:")
+    for i, region in enumerate(regions, 1):
+        print(f"    Speaker {i}: {region['width']}x{region['height']} at ({region['x']}, {region['y']})")
+
+def build_speaker_aware_filter(video_file, scene_type, num_speakers, base_dir):
+    """
+    (graph, regions) showing the most active speakers of the clip (4-5 speaker episodes),
+    from the transcript. regions is None for grid layouts (they scale their tiles).
+    """
+    # Find matching transcript
+    transcript_path = find_transcript_for_clip(video_file, base_dir)
+    if transcript_path is None:
+        return _static_vstack(num_speakers, scene_type, "No transcript found")
+
+    print(f"  📄 Using transcript: {transcript_path.name}")
+
+    clip_start, clip_end = get_clip_time_range(video_file, base_dir)
+
+    # Analyze speaker timeline
+    print(f"  🔍 Analyzing speakers from {clip_start:.1f}s to {clip_end:.1f}s (original video timestamps)...")
+    speaker_timeline = analyze_speaker_timeline(transcript_path, clip_start, clip_end)
+    if not speaker_timeline:
+        return _static_vstack(num_speakers, scene_type, "No speaker data found")
+
+    # Calculate speaker activity (talk time)
+    speaker_mapping = SPEAKER_MAPPING.get(num_speakers, {})
+    sorted_speakers, talk_time = calculate_speaker_activity(
+        speaker_timeline,
+        num_speakers,
+        speaker_mapping
+    )
+
+    print("  📊 Speaker activity (by talk time):")
+    for i, spkr in enumerate(sorted_speakers, 1):
+        time = talk_time.get(spkr, 0)
+        print(f"     {i}. {spkr}: {time:.1f}s")
+    if scene_type == 'content':
+        print("  📄 Using content scene crop positions")
+
+    # Positions of the speakers by activity, looked up once; crops are the precomputed filters
+    positions = [speaker_mapping.get(spkr, i) for i, spkr in enumerate(sorted_speakers)]
+    scene_crops = CROP_FILTERS[num_speakers][scene_type]
+
+    if num_speakers in LAYOUTS:
+        # 5 speakers: 2×2 grid + 1 bottom (least active gets covered by subtitles)
+        print("  📐 Using 2×2+1 grid layout (least active speaker at bottom)")
+        return build_grid(pick_crops(scene_crops, positions, len(LAYOUTS[num_speakers]['grid'])), num_speakers), None
+
+    # 3-4 speakers: vertical stack of top 3
+    print("  📐 Showing top 3 speakers (vertical stack)")
+    regions = pick_crops(scene_regions(num_speakers, scene_type), positions, 3)
+    return build_crop_vstack(pick_crops(scene_crops, positions, 3)), regions
+
+def build_scene_filter(video_file, scene_type, num_speakers, crop_config, base_dir):
+    """
+    Build the filter_complex graph for one scene type, as (graph, regions).
+    The graph reads from [0:v] and ends in [out]. regions are the crop config entries
+    stacked top to bottom for plain vertical stacks, None for grid layouts.
+    Returns (None, None) if the scene isn't configured.
+    """
+    if scene_type == 'content':
+        # Content sharing scene
+        content_config = crop_config.get('content', None)
+        if not content_config:
+            print("  ⚠️ No content scene configuration - skipping")
+            return None, None
+
+        # Check if content is a single crop (3 speakers) or multi-position (4-5 speakers)
+        if isinstance(content_config, dict):
+            # 3 speakers: Single crop (speakers on right side)
+            print(f"  Crop: {content_config['width']}x{content_config['height']} at position ({content_config['x']}, {content_config['y']})")
+            return STATIC_FILTERS[(num_speakers, 'content')]
+
+        # 4-5 speakers: Show 3 most active with different positions/sizes
+        # Use same logic as speakers scene but with content scene positions
+        print(f"  🎙️ Content scene with {num_speakers} speakers - showing 3 most active")
+
+        if num_speakers <= 3 or not DYNAMIC_CONFIG['enabled']:
+            # Show first 3 positions
+            _print_regions(content_config[:3], " in content layout")
+            return STATIC_FILTERS[(num_speakers, 'content')]
+
+        return build_speaker_aware_filter(video_file, 'content', num_speakers, base_dir)
+
+    # Speakers scene - stack speakers vertically
+    speaker_positions = crop_config.get('speakers', [])
+    if not speaker_positions:
+        print("  ⚠️ No speakers scene configuration - skipping")
+        return None, None
+
+    # For 3 speakers or when dynamic cropping is disabled: show all speakers
+    if num_speakers <= 3 or not DYNAMIC_CONFIG['enabled']:
+        # Show all speakers (or first 3 if more than 3)
+        _print_regions(speaker_positions[:min(num_speakers, 3)])
+        return STATIC_FILTERS[(num_speakers, 'speakers')]
+
+    # 4-5 speakers: Use speaker-aware dynamic cropping
+    print(f"  🎙️ Speaker-aware mode: showing 3/{num_speakers} speakers based on conversation")
+    return build_speaker_aware_filter(video_file, 'speakers', num_speakers, base_dir)
+
+def prefix_filter_labels(filter_complex, prefix):
+    """Rename every link label in a graph (except input streams like [0:v]) so graphs can be combined"""
+    return re.sub(r'\[(?!\d+:)([^\]]+)\]', lambda m: f"[{prefix}{m.group(1)}]", filter_complex)
+
+def build_ffmpeg_cmd(video_file, outputs, graph_path, seek=(), audio=True):
+    """
+    Build a single ffmpeg command writing every (filter_complex, output_file) in outputs.
+    All graphs read the same [0:v] stream, so the input is decoded once no matter
+    how many crop variants are rendered.
+    The combined graph is written to graph_path and passed with -filter_complex_script,
+    so long grid graphs never hit the command-line length limit.
+    seek holds input options selecting a time range (-ss/-t) for split renders;
+    those are rendered without audio (audio=False), which is muxed back in once when joining.
+    """
+    cmd = [FFMPEG, '-y', *hwaccel_args(), *seek, '-i', str(video_file)]
+
+    if len(outputs) == 1:
+        graphs = [outputs[0][0]]
+        labels = ['[out]']
+    else:
+        graphs = [prefix_filter_labels(graph, f"o{i}_") for i, (graph, _) in enumerate(outputs)]
+        labels = [f"[o{i}_out]" for i in range(len(outputs))]
+
+    graph_path.write_text(';'.join(graphs), encoding='utf-8')
+    cmd += ['-filter_complex_script', str(graph_path)]
+    audio_args = ['-map', '0:a?', '-c:a', 'copy'] if audio else ['-an']
+    for label, (_, output_file) in zip(labels, outputs):
+        cmd += ['-map', label, *audio_args, *video_encoder_args(['-c:v', 'libx264', '-threads', str(FFMPEG_THREADS)]), str(output_file)]
+
+    return cmd
+
+def is_up_to_date(output_file, source_mtime):
+    """Make-style check: output exists and is at least as new as its source"""
+    return output_exists(output_file) and output_file.stat().st_mtime >= source_mtime
+
+def vertical_output_file(video_file, output_dir, scene=None, subtitled=False):
+    """Output path for video_file (scene is set for 'both scenes' renders, which write two files)"""
+    name = f"{video_file.stem}_vertical" + (f"_{scene}" if scene else '') + ('_subtitled' if subtitled else '')
+    return output_dir / f"{name}{video_file.suffix}"
+
+def is_already_cropped(video_file, output_dir, subtitled=False):
+    """True if the vertical output(s) for video_file exist and are newer than the clip"""
+    source_mtime = video_file.stat().st_mtime
+    if is_up_to_date(vertical_output_file(video_file, output_dir, subtitled=subtitled), source_mtime):
+        return True
+    # 'Both scenes' mode renders two files
+    return all(is_up_to_date(vertical_output_file(video_file, output_dir, scene, subtitled), source_mtime)
+               for scene in ('speakers', 'content'))
+
+def print_progress(seconds):
+    """Single-line encode progress"""
+    print(f"\r  ⏳ Encoded {seconds:.1f}s", end='', flush=True)
+
+def render_in_parts(video_file, outputs, graph_path, parts, on_progress=None):
+    """
+    Encode every (filter_complex, output_file) in outputs as `parts` equal time ranges
+    of video_file, one ffmpeg process per range (input-side -ss/-t) running in parallel,
+    then join each output's video parts with the concat demuxer (stream copy) and take the
+    audio whole from the source, so stream-copied audio packets never straddle a part seam.
+    Returns (ok, stderr_tail) like run_ffmpeg.
+    """
+    part_duration = probe_video(video_file).duration / parts
+    bounds = [round(i * part_duration, 3) for i in range(parts + 1)]  # Parts meet exactly
+    part_files = [[output_file.with_suffix(f".part{i}{output_file.suffix}") for i in range(parts)]
+                  for _, output_file in outputs]
+    list_files = [output_file.with_suffix('.concat.txt') for _, output_file in outputs]
+    
+    # Commands are built up front: each build rewrites the (identical) graph script
+    cmds = []
+    for i in range(parts):
+        seek = ['-ss', f"{bounds[i]:.3f}"]
+        if i < parts - 1:
+            seek += ['-t', f"{bounds[i + 1] - bounds[i]:.3f}"]  # The last part runs to the end
+        part_outputs = [(graph, files[i]) for (graph, _), files in zip(outputs, part_files)]
+        cmds.append(build_ffmpeg_cmd(video_file, part_outputs, graph_path, seek, audio=False))
+    
+    progress = [0.0] * parts
+    
+    def render_part(i):
+        report = None
+        if on_progress is not None:
+            def report(seconds):
+                progress[i] = seconds
+                on_progress(sum(progress))
+        return run_ffmpeg(cmds[i], on_progress=report)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=parts) as executor:
+            results = list(executor.map(render_part, range(parts)))
+        for ok, stderr in results:
+            if not ok:
+                return False, stderr
+        
+        for files, list_file, (_, output_file) in zip(part_files, list_files, outputs):
+            # Paths in the list are relative to the list file (same .partial/ folder)
+            list_file.write_text(''.join("file '{}'\n".format(f.name.replace("'", "'\\''")) for f in files),
+                                 encoding='utf-8')
+            ok, stderr = run_ffmpeg([FFMPEG, '-y', '-f', 'concat', '-safe', '0', '-i', str(list_file),
+                                     '-i', str(video_file), '-map', '0:v', '-map', '1:a?', '-c', 'copy',
+                                     str(output_file)])
+            if not ok:
+                return False, stderr
+        return True, ''
+    finally:
+        for path in [*list_files, *(f for files in part_files for f in files)]:
+            path.unlink(missing_ok=True)
+
+def burn_subtitles(filter_complex, ass_file):
+    """Append the ass filter to a scene graph's [out] (ass_file is resolved from ffmpeg's cwd)"""
+    return filter_complex[:-len('[out]')] + f"[stacked];[stacked]ass={ass_file.name}[out]"
+
+def render_scenes(video_file, scene_type, num_speakers, output_dir=CROPPED_DIR, on_progress=None, ass_file=None,
+                  parts=1):
+    """
+    Render video_file for scene_type ('speakers', 'content' or 'both') in a single FFmpeg run.
+    With ass_file the subtitles are burned into the stacked frames in the same run,
+    so the clip is decoded and encoded once (outputs get the '_subtitled' suffix).
+    parts > 1 splits clips of at least SPLIT_MIN_DURATION into that many time ranges
+    encoded in parallel (see render_in_parts).
+    Returns (ok, output_files, stderr_tail); ok is None when no scene is configured.
+    """
+    crop_config = CROP_CONFIGS[num_speakers]
+    
+    if scene_type == 'both':
+        scene_types = ['speakers', 'content']
+    else:
+        scene_types = [scene_type]
+    
+    # Build one graph per requested scene; every graph shares the same decoded input
+    outputs = []
+    stacks = []  # Regions of each output's vertical stack (None for grids)
+    subtitled = ass_file is not None
+    for scene in scene_types:
+        output_file = vertical_output_file(video_file, output_dir, scene if len(scene_types) > 1 else None, subtitled)
+        
+        print(f"\nProcessing: {num_speakers} speakers, {scene.upper()} scene")
+        
+        filter_complex, regions = build_scene_filter(video_file, scene, num_speakers, crop_config, BASE_DIR)
+        if filter_complex is not None:
+            if subtitled:
+                filter_complex = burn_subtitles(filter_complex, ass_file)
+            outputs.append((filter_complex, output_file))
+            stacks.append(regions)
+    
+    if not outputs:
+        return None, [], ''
+    
+    # Encode to .partial/ and move into place once FFmpeg succeeded
+    partial_outputs = [(graph, partial_path(output_file)) for graph, output_file in outputs]
+    graph_path = partial_outputs[0][1].with_suffix('.fg.txt')
+    
+    if parts > 1:
+        info = probe_video(video_file)
+        # Subtitled renders stay whole: the ass filter would see each part's timestamps restart at 0
+        if subtitled or info is None or info.duration < SPLIT_MIN_DURATION:
+            parts = 1
+    
+    try:
+        # Single crop/stack output: render in-process when PyAV is available
+        regions = None
+        if len(outputs) == 1 and av is not None and AV_ENCODE and not subtitled and parts == 1:
+            regions = stacks[0]
+        if regions:
+            try:
+                render_crop_stack_av(video_file, regions, partial_outputs[0][1], on_progress)
+                if on_progress is not None:
+                    print()  # End the progress line
+                os.replace(partial_outputs[0][1], outputs[0][1])
+                return True, [outputs[0][1]], ''
+            except Exception as e:
+                print(f"\n  ⚠ PyAV encode failed ({e}), falling back to ffmpeg")
+        
+        if parts > 1:
+            print(f"  Encoding in {parts} parallel parts")
+            ok, stderr = render_in_parts(video_file, partial_outputs, graph_path, parts, on_progress)
+        else:
+            cmd = build_ffmpeg_cmd(video_file, partial_outputs, graph_path)
+            ok, stderr = run_ffmpeg(cmd, on_progress=on_progress, cwd=ass_file.parent if subtitled else None)
+        if on_progress is not None:
+            print()  # End the progress line
+        if not ok:
+            return False, [], stderr
+        
+        for (_, partial_file), (_, output_file) in zip(partial_outputs, outputs):
+            os.replace(partial_file, output_file)
+        return True, [output_file for _, output_file in outputs], ''
+    finally:
+        graph_path.unlink(missing_ok=True)
+        for _, partial_file in partial_outputs:
+            partial_file.unlink(missing_ok=True)
+
+def render_crop_stack_av(video_file, regions, output_file, on_progress=None):
+    """
+    Crop the regions, stack them vertically and encode - all in-process with PyAV.
+    The filter graph is split → crop × N → xstack; audio packets are copied as-is.
+    """
+    with av.open(str(video_file)) as src, av.open(str(output_file), 'w') as dst:
+        in_video = src.streams.video[0]
+        in_audio = src.streams.audio[0] if src.streams.audio else None
+        
+        # split → crop (one per region) → xstack → sink
+        graph = av.filter.Graph()
+        buffer = graph.add_buffer(template=in_video)
+        crops = [graph.add('crop', f"{r['width']}:{r['height']}:{r['x']}:{r['y']}") for r in regions]
+        if len(crops) == 1:
+            buffer.link_to(crops[0])
+            last = crops[0]
+        else:
+            split = graph.add('split', str(len(crops)))
+            stack = graph.add('xstack', f"inputs={len(crops)}:layout={vertical_layout(len(crops))}:fill=black")
+            buffer.link_to(split)
+            for i, crop in enumerate(crops):
+                split.link_to(crop, i, 0)
+                crop.link_to(stack, 0, i)
+            last = stack
+        last.link_to(graph.add('buffersink'))
+        graph.configure()
+        
+        codec_name, options = encoder_codec_options(['-c:v', 'libx264'])
+        out_video = dst.add_stream(codec_name, rate=in_video.average_rate, options=options)
+        out_video.width, out_video.height = stack_size(regions)  # Same frame size the xstack produces
+        out_video.pix_fmt = 'yuv420p'
+        out_video.time_base = in_video.time_base
+        out_video.codec_context.thread_count = FFMPEG_THREADS
+        
+        out_audio = None
+        if in_audio is not None:
+            add_from_template = getattr(dst, 'add_stream_from_template', None)  # PyAV 14+
+            out_audio = add_from_template(in_audio) if add_from_template else dst.add_stream(template=in_audio)
+        
+        def encode_ready_frames():
+            while True:
+                try:
+                    frame = graph.pull()
+                except (BlockingIOError, EOFError):
+                    return
+                dst.mux(out_video.encode(frame))
+                if on_progress is not None and frame.time is not None:
+                    on_progress(frame.time)
+        
+        streams = [s for s in (in_video, in_audio) if s is not None]
+        for packet in src.demux(*streams):
+            if packet.dts is None:
+                continue  # Demuxer flush packet
+            if packet.stream is in_audio:
+                packet.stream = out_audio
+                dst.mux(packet)
+                continue
+            for frame in packet.decode():
+                graph.push(frame)
+                encode_ready_frames()
+        
+        # Flush the filter graph, then the encoder
+        graph.push(None)
+        encode_ready_frames()
+        dst.mux(out_video.encode(None))
+
+def existing_outputs(video_file, output_dir=CROPPED_DIR):
+    """Vertical outputs already rendered for video_file"""
+    return sorted(f for f in output_dir.glob(f"{video_file.stem}_vertical*{video_file.suffix}") if output_exists(f))
+
+def report_render(ok, output_files, stderr):
+    """Print the outcome of render_scenes()"""
+    if ok:
+        for output_file in output_files:
+            print(f"✓ Saved: {output_file.name}")
+    elif ok is False:
+        print("✗ FFmpeg error:")
+        print(stderr)
+
+def render_job(job, **render_options):
+    """
+    Worker task: render one (video_file, scene_type, num_speakers) job.
+    render_options are passed on to render_scenes (output_dir, ass_file).
+    Returns (video_file, ok, log, output_files) - prints are buffered in log
+    so parallel renders don't interleave.
+    """
+    video_file, scene_type, num_speakers = job
+    log = io.StringIO()
+    with redirect_stdout(log):
+        try:
+            ok, output_files, stderr = render_scenes(video_file, scene_type, num_speakers, **render_options)
+            report_render(ok, output_files, stderr)
+        except Exception as e:
+            print(f"✗ Exception: {e}")
+            ok, output_files = False, []
+    return video_file, ok, log.getvalue(), output_files
+
+def process_one(video_file, num_speakers, output_dir=CROPPED_DIR, ass_file=None):
+    """
+    Pipeline entry point: crop one clip without prompting.
+    Scenes that can't be auto-detected are rendered both ways ('both').
+    With ass_file the subtitles are burned in during the same encode.
+    Returns (ok, log, output_files) with everything printed captured in log.
+    """
+    log = io.StringIO()
+    with redirect_stdout(log):
+        try:
+            print(f"\n{video_file.name}")
+            
+            if is_already_cropped(video_file, output_dir, subtitled=ass_file is not None):
+                print("⊗ Up-to-date - skipping")
+                return True, log.getvalue(), existing_outputs(video_file, output_dir)
+            
+            scene_type = detect_crop_mode(video_file, num_speakers)
+            if scene_type is None:
+                print("  ⚠ No auto-detection - rendering both scenes")
+                scene_type = 'both'
+        except Exception as e:
+            print(f"✗ Exception: {e}")
+            return False, log.getvalue(), []
+    
+    _, ok, render_log, output_files = render_job((video_file, scene_type, num_speakers),
+                                                 output_dir=output_dir, ass_file=ass_file)
+    return bool(ok), log.getvalue() + render_log, output_files
+
 def crop_to_vertical():
     """
     Crop videos from candidates folder to 9:16 aspect ratio for TikTok/Instagram/YouTube Shorts.
@@ -434,9 +1274,10 @@ def crop_to_vertical():
     """
     
     # Define paths
-    base_dir = Path(__file__).parent.parent.parent  # Go up three levels: steps -> scripts -> project root
-    candidates_dir = base_dir / "output" / "extracted"
-    output_dir = base_dir / "output" / "cropped"
+    candidates_dir = CANDIDATES_DIR
+    output_dir = CROPPED_DIR
+    
+    require_ffmpeg()
     
     # Create output directory if it doesn't exist
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -449,12 +1290,11 @@ def crop_to_vertical():
         print(f"❌ No configuration found for {num_speakers} speakers")
         return
     
-    crop_config = CROP_CONFIGS[num_speakers]
-    
-    # Get all video files from candidates folder
-    video_extensions = ['.mp4', '.mov', '.avi', '.mkv']
-    video_files = [f for f in candidates_dir.iterdir() 
-                   if f.is_file() and f.suffix.lower() in video_extensions]
+    # Get all video files from candidates folder (scandir: no Path/stat() per entry)
+    video_extensions = frozenset({'.mp4', '.mov', '.avi', '.mkv'})
+    with os.scandir(candidates_dir) as entries:
+        video_files = [Path(entry.path) for entry in entries
+                       if os.path.splitext(entry.name)[1].lower() in video_extensions and entry.is_file()]
     
     if not video_files:
         print(f"No video files found in {candidates_dir}")
@@ -462,407 +1302,92 @@ def crop_to_vertical():
     
     print(f"Found {len(video_files)} video(s) to process")
     print(f"Episode: {num_speakers} speakers")
+    print(f"Encoder: {encoder_name()}")
     print("=" * 60)
     
     successful = 0
     failed = 0
     
+    # Resume/rerun: clips whose outputs are newer than the clip are skipped,
+    # a re-extracted clip gets cropped again
+    skipped = 0
+    
+    # Auto-detect scene type (speakers vs content) of every clip to render, classified in one batch
+    pending = [video_file for video_file in video_files if not is_already_cropped(video_file, output_dir)]
+    detections = dict(zip(pending, detect_crop_modes(pending, num_speakers)))
+    
+    # 1. Serial pass: skip checks, detection results and manual prompts (workers can't prompt)
+    jobs = []
     for idx, video_file in enumerate(video_files, 1):
         print(f"\n[{idx}/{len(video_files)}] {video_file.name}")
         
-        # Auto-detect scene type (speakers vs content)
-        scene_type = detect_crop_mode(video_file, num_speakers)
+        if video_file not in detections:
+            print("⊗ Up-to-date - skipping")
+            skipped += 1
+            continue
+        
+        scene_type, detection_log = detections[video_file]
+        print(detection_log, end='')
         
         if scene_type is None:
             # Manual mode selection
             print("\nScene type:")
             print("  1 = Content sharing scene")
             print("  2 = Speakers scene (main discussion)")
+            print("  B = Both scenes (single decode, pick the right one later)")
             print("  Q = Skip this video")
             
-            scene_choice = input("\nYour choice (1/2/Q): ").strip().lower()
+            scene_choice = input("\nYour choice (1/2/B/Q): ").strip().lower()
             
             if scene_choice == 'q':
                 print("⊗ Skipped\n")
                 continue
             elif scene_choice == '2':
                 scene_type = 'speakers'
+            elif scene_choice == 'b':
+                scene_type = 'both'
             else:
                 scene_type = 'content'
         
-        output_file = output_dir / f"{video_file.stem}_vertical{video_file.suffix}"
-        
-        print(f"\nProcessing: {num_speakers} speakers, {scene_type.upper()} scene")
-        
-        if scene_type == 'content':
-            # Content sharing scene
-            content_config = crop_config.get('content', None)
-            if not content_config:
-                print("  ⚠️ No content scene configuration - skipping")
-                continue
-            
-            # Check if content is a single crop (3 speakers) or multi-position (4-5 speakers)
-            if isinstance(content_config, dict):
-                # 3 speakers: Single crop (speakers on right side)
-                x = content_config['x']
-                y = content_config['y']
-                w = content_config['width']
-                h = content_config['height']
-                
-                print(f"  Crop: {w}x{h} at position ({x}, {y})")
-                
-                cmd = [
-                    'ffmpeg',
-                    '-i', str(video_file),
-                    '-vf', f'crop={w}:{h}:{x}:{y}',
-                    '-c:a', 'copy',
-                    '-y',
-                    str(output_file)
-                ]
-            else:
-                # 4-5 speakers: Show 3 most active with different positions/sizes
-                # Use same logic as speakers scene but with content scene positions
-                print(f"  🎙️ Content scene with {num_speakers} speakers - showing 3 most active")
-                
-                if num_speakers <= 3 or not DYNAMIC_CONFIG['enabled']:
-                    # Show first 3 positions
-                    regions = content_config[:3]
-                    
-                    print(f"  Showing {len(regions)} speaker(s) in content layout:")
-                    for i, region in enumerate(regions, 1):
-                        print(f"    Speaker {i}: {region['width']}x{region['height']} at ({region['x']}, {region['y']})")
-                    
-                    crop_filters = []
-                    for i, region in enumerate(regions):
-                        x, y, w, h = region['x'], region['y'], region['width'], region['height']
-                        crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[v{i}]")
-                    
-                    filter_complex = ';'.join(crop_filters) + ';' + ''.join(f"[v{i}]" for i in range(len(crop_filters))) + f"vstack=inputs={len(crop_filters)}[out]"
-                else:
-                    # Use transcript for speaker-aware selection
-                    transcript_path = find_transcript_for_clip(video_file, base_dir)
-                    
-                    if transcript_path is None:
-                        print("  ⚠️ No transcript - showing first 3 speakers in content layout")
-                        regions = content_config[:3]
-                        
-                        crop_filters = []
-                        for i, crop in enumerate(regions):
-                            x, y, w, h = crop['x'], crop['y'], crop['width'], crop['height']
-                            crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[v{i}]")
-                        
-                        filter_complex = ';'.join(crop_filters) + ';' + ''.join(f"[v{i}]" for i in range(len(crop_filters))) + f"vstack=inputs={len(crop_filters)}[out]"
-                    else:
-                        print(f"  📄 Using transcript: {transcript_path.name}")
-                        
-                        # Get original timestamps from clips.json
-                        timestamps = get_clip_timestamps(video_file, base_dir)
-                        
-                        if timestamps is None:
-                            # Fallback: use clip duration
-                            print("  ⚠️ Using clip duration as fallback (timestamps not found)")
-                            probe_cmd = [
-                                'ffprobe',
-                                '-v', 'error',
-                                '-show_entries', 'format=duration',
-                                '-of', 'csv=p=0',
-                                str(video_file)
-                            ]
-                            probe_result = subprocess.run(probe_cmd, capture_output=True, text=True)
-                            clip_start = 0
-                            clip_end = float(probe_result.stdout.strip()) if probe_result.returncode == 0 else 60
-                        else:
-                            clip_start, clip_end = timestamps
-                        
-                        speaker_timeline = analyze_speaker_timeline(transcript_path, clip_start, clip_end)
-                        
-                        if not speaker_timeline:
-                            print("  ⚠️ No speaker data - using first 3 in content layout")
-                            regions = content_config[:3]
-                            
-                            crop_filters = []
-                            for i, crop in enumerate(regions):
-                                x, y, w, h = crop['x'], crop['y'], crop['width'], crop['height']
-                                crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[v{i}]")
-                            
-                            filter_complex = ';'.join(crop_filters) + ';' + ''.join(f"[v{i}]" for i in range(len(crop_filters))) + f"vstack=inputs={len(crop_filters)}[out]"
-                        else:
-                            # Calculate speaker activity (talk time)
-                            speaker_mapping = SPEAKER_MAPPING.get(num_speakers, {})
-                            sorted_speakers, talk_time = calculate_speaker_activity(
-                                speaker_timeline, 
-                                num_speakers, 
-                                speaker_mapping
-                            )
-                            
-                            print("  📊 Speaker activity (by talk time):")
-                            for i, spkr in enumerate(sorted_speakers, 1):
-                                time = talk_time.get(spkr, 0)
-                                print(f"     {i}. {spkr}: {time:.1f}s")
-                            print("  📄 Using content scene crop positions")
-                            
-                            if num_speakers == 5:
-                                # 5 speakers: 2×2 grid + 1 bottom
-                                print("  📐 Using 2×2+1 grid layout (least active speaker at bottom)")
-                                
-                                # Map speakers to their crop positions
-                                positions = [speaker_mapping.get(spkr, i) for i, spkr in enumerate(sorted_speakers)]
-                                crops = [content_config[pos] for pos in positions[:5] if pos < len(content_config)]
-                                
-                                # Ensure we have all 5 crops
-                                while len(crops) < 5 and len(content_config) > 0:
-                                    crops.append(content_config[len(crops) % len(content_config)])
-                                
-                                # Build 2×2+1 grid filter
-                                crop_filters = []
-                                for i, crop in enumerate(crops[:5]):
-                                    x, y, w, h = crop['x'], crop['y'], crop['width'], crop['height']
-                                    crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[spk{i}]")
-                                
-                                # Target dimensions for 1080×1920 vertical video
-                                row_height = 640  # 1920 ÷ 3 rows = 640 per row
-                                half_width = 540  # 1080 ÷ 2 = 540 per speaker in top/middle rows
-                                
-                                # For all speakers: crop to 8:9 (narrower) from center to prevent stretching
-                                # Top/middle: scale to 540×640, Bottom: scale to 1080×640
-                                
-                                filter_complex = (
-                                    ';'.join(crop_filters) + ';' +
-                                    # Top row: allow stretch to fill 540×640
-                                    '[spk0]scale=540:640:force_original_aspect_ratio=increase,crop=540:640,setsar=1[top0];' +
-                                    '[spk1]scale=540:640:force_original_aspect_ratio=increase,crop=540:640,setsar=1[top1];' +
-                                    '[top0][top1]hstack[top];' +
-                                    # Middle row: allow stretch to fill 540×640
-                                    '[spk2]scale=540:640:force_original_aspect_ratio=increase,crop=540:640,setsar=1[mid0];' +
-                                    '[spk3]scale=540:640:force_original_aspect_ratio=increase,crop=540:640,setsar=1[mid1];' +
-                                    '[mid0][mid1]hstack[mid];' +
-                                    # Bottom: preserve aspect, then pad to 1080×640 (no stretch)
-                                    '[spk4]crop=iw*8/9:ih:(iw-iw*8/9)/2:0,scale=1080:640:force_original_aspect_ratio=decrease,pad=1080:640:(ow-iw)/2:(oh-ih)/2,setsar=1[bottom];' +
-                                    '[top][mid][bottom]vstack=inputs=3[out]'
-                                )
-                            else:
-                                # 3-4 speakers: vertical stack of top 3
-                                print("  📐 Showing top 3 speakers (vertical stack)")
-                                
-                                # Map to content scene positions
-                                positions = [speaker_mapping.get(spkr, i % len(content_config)) for i, spkr in enumerate(sorted_speakers[:3])]
-                                crops = [content_config[pos] for pos in positions if pos < len(content_config)]
-                                
-                                # Ensure we have exactly 3 crops
-                                while len(crops) < 3 and len(content_config) > 0:
-                                    crops.append(content_config[len(crops) % len(content_config)])
-                                
-                                crop_filters = []
-                                for i, crop in enumerate(crops[:3]):
-                                    x, y, w, h = crop['x'], crop['y'], crop['width'], crop['height']
-                                    crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[v{i}]")
-                                
-                                filter_complex = ';'.join(crop_filters) + ';' + ''.join(f"[v{i}]" for i in range(len(crop_filters))) + f"vstack=inputs={len(crop_filters)}[out]"
-                
-                cmd = [
-                    'ffmpeg',
-                    '-i', str(video_file),
-                    '-filter_complex', filter_complex,
-                    '-map', '[out]',
-                    '-map', '0:a',
-                    '-c:a', 'copy',
-                    '-y',
-                    str(output_file)
-                ]
-        else:  # speakers scene
-            # Speakers scene - stack speakers vertically
-            speaker_positions = crop_config.get('speakers', [])
-            if not speaker_positions:
-                print("  ⚠️ No speakers scene configuration - skipping")
-                continue
-            
-            # For 3 speakers or when dynamic cropping is disabled: show all speakers
-            if num_speakers <= 3 or not DYNAMIC_CONFIG['enabled']:
-                # Show all speakers (or first 3 if more than 3)
-                regions = speaker_positions[:min(num_speakers, 3)]
-                
-                print(f"  Showing {len(regions)} speaker(s):")
-                for i, region in enumerate(regions, 1):
-                    print(f"    Speaker {i}: {region['width']}x{region['height']} at ({region['x']}, {region['y']})")
-                
-                # Build filter: crop each region then stack vertically
-                crop_filters = []
-                for i, region in enumerate(regions):
-                    x, y, w, h = region['x'], region['y'], region['width'], region['height']
-                    crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[v{i}]")
-                
-                filter_complex = ';'.join(crop_filters) + ';' + ''.join(f"[v{i}]" for i in range(len(crop_filters))) + f"vstack=inputs={len(crop_filters)}[out]"
-                
-                cmd = [
-                    'ffmpeg',
-                    '-i', str(video_file),
-                    '-filter_complex', filter_complex,
-                    '-map', '[out]',
-                    '-map', '0:a',
-                    '-c:a', 'copy',
-                    '-y',
-                    str(output_file)
-                ]
-            else:
-                # 4-5 speakers: Use speaker-aware dynamic cropping
-                print(f"  🎙️ Speaker-aware mode: showing 3/{num_speakers} speakers based on conversation")
-                
-                # Find matching transcript
-                transcript_path = find_transcript_for_clip(video_file, base_dir)
-                
-                if transcript_path is None:
-                    print("  ⚠️ No transcript found - showing first 3 speakers")
-                    # Fall back to showing first 3 speaker positions
-                    regions = speaker_positions[:3]
-                    
-                    # Build static filter
-                    crop_filters = []
-                    for i, crop in enumerate(regions):
-                        x, y, w, h = crop['x'], crop['y'], crop['width'], crop['height']
-                        crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[v{i}]")
-                    
-                    filter_complex = ';'.join(crop_filters) + ';' + ''.join(f"[v{i}]" for i in range(len(crop_filters))) + f"vstack=inputs={len(crop_filters)}[out]"
-                else:
-                    print(f"  📄 Using transcript: {transcript_path.name}")
-                    
-                    # Get original timestamps from clips.json
-                    timestamps = get_clip_timestamps(video_file, base_dir)
-                    
-                    if timestamps is None:
-                        # Fallback: use clip duration
-                        print("  ⚠️ Using clip duration as fallback (timestamps not found)")
-                        probe_cmd = [
-                            'ffprobe',
-                            '-v', 'error',
-                            '-show_entries', 'format=duration',
-                            '-of', 'csv=p=0',
-                            str(video_file)
-                        ]
-                        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True)
-                        clip_start = 0
-                        clip_end = float(probe_result.stdout.strip()) if probe_result.returncode == 0 else 60
-                    else:
-                        clip_start, clip_end = timestamps
-                    
-                    # Analyze speaker timeline
-                    print(f"  🔍 Analyzing speakers from {clip_start:.1f}s to {clip_end:.1f}s (original video timestamps)...")
-                    speaker_timeline = analyze_speaker_timeline(transcript_path, clip_start, clip_end)
-                    
-                    if not speaker_timeline:
-                        print("  ⚠️ No speaker data found - showing first 3 speakers")
-                        regions = speaker_positions[:3]
-                        
-                        crop_filters = []
-                        for i, crop in enumerate(regions):
-                            x, y, w, h = crop['x'], crop['y'], crop['width'], crop['height']
-                            crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[v{i}]")
-                        
-                        filter_complex = ';'.join(crop_filters) + ';' + ''.join(f"[v{i}]" for i in range(len(crop_filters))) + f"vstack=inputs={len(crop_filters)}[out]"
-                    else:
-                        # Get speaker mapping for this configuration
-                        speaker_mapping = SPEAKER_MAPPING.get(num_speakers, {})
-                        
-                        # Calculate speaker activity (talk time)
-                        sorted_speakers, talk_time = calculate_speaker_activity(
-                            speaker_timeline, 
-                            num_speakers, 
-                            speaker_mapping
-                        )
-                        
-                        print("  📊 Speaker activity (by talk time):")
-                        for i, spkr in enumerate(sorted_speakers, 1):
-                            time = talk_time.get(spkr, 0)
-                            print(f"     {i}. {spkr}: {time:.1f}s")
-                        
-                        if num_speakers == 5:
-                            # 5 speakers: 2×2 grid + 1 bottom (least active gets covered by subtitles)
-                            print("  📐 Using 2×2+1 grid layout (least active speaker at bottom)")
-                            
-                            # Map speakers to their crop positions
-                            positions = [speaker_mapping.get(spkr, i) for i, spkr in enumerate(sorted_speakers)]
-                            crops = [speaker_positions[pos] for pos in positions[:5] if pos < len(speaker_positions)]
-                            
-                            # Ensure we have all 5 crops
-                            while len(crops) < 5 and len(speaker_positions) > 0:
-                                crops.append(speaker_positions[len(crops) % len(speaker_positions)])
-                            
-                            # Build 2×2+1 grid filter
-                            # Crop all 5 speakers
-                            crop_filters = []
-                            for i, crop in enumerate(crops[:5]):
-                                x, y, w, h = crop['x'], crop['y'], crop['width'], crop['height']
-                                crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[spk{i}]")
-                            
-                            # Target dimensions for 1080×1920 vertical video
-                            row_height = 640  # 1920 ÷ 3 rows = 640 per row
-                            half_width = 540  # 1080 ÷ 2 = 540 per speaker in top/middle rows
-                            
-                            # For all speakers: crop to 8:9 (narrower) from center to prevent stretching
-                            # Top/middle: scale to 540×640, Bottom: scale to 1080×640
-                            # 8:9 aspect ratio at height 640 → width = 640*(8/9) = 568.89
-                            
-                            filter_complex = (
-                                ';'.join(crop_filters) + ';' +
-                                # Top row: allow stretch to fill 540×640
-                                '[spk0]scale=540:640:force_original_aspect_ratio=increase,crop=540:640,setsar=1[top0];' +
-                                '[spk1]scale=540:640:force_original_aspect_ratio=increase,crop=540:640,setsar=1[top1];' +
-                                '[top0][top1]hstack[top];' +
-                                # Middle row: allow stretch to fill 540×640
-                                '[spk2]scale=540:640:force_original_aspect_ratio=increase,crop=540:640,setsar=1[mid0];' +
-                                '[spk3]scale=540:640:force_original_aspect_ratio=increase,crop=540:640,setsar=1[mid1];' +
-                                '[mid0][mid1]hstack[mid];' +
-                                # Bottom: preserve aspect, then pad to 1080×640 (no stretch)
-                                '[spk4]crop=iw*8/9:ih:(iw-iw*8/9)/2:0,scale=1080:640:force_original_aspect_ratio=decrease,pad=1080:640:(ow-iw)/2:(oh-ih)/2,setsar=1[bottom];' +
-                                '[top][mid][bottom]vstack=inputs=3[out]'
-                            )
-                        else:
-                            # 3-4 speakers: vertical stack of top 3
-                            print("  📐 Showing top 3 speakers (vertical stack)")
-                            
-                            # Map speakers to their positions
-                            positions = [speaker_mapping.get(spkr, i) for i, spkr in enumerate(sorted_speakers[:3])]
-                            crops = [speaker_positions[pos] for pos in positions if pos < len(speaker_positions)]
-                            
-                            # Ensure we have exactly 3 crops
-                            while len(crops) < 3 and len(speaker_positions) > 0:
-                                crops.append(speaker_positions[len(crops) % len(speaker_positions)])
-                            
-                            crop_filters = []
-                            for i, crop in enumerate(crops[:3]):
-                                x, y, w, h = crop['x'], crop['y'], crop['width'], crop['height']
-                                crop_filters.append(f"[0:v]crop={w}:{h}:{x}:{y}[v{i}]")
-                            
-                            filter_complex = ';'.join(crop_filters) + ';' + ''.join(f"[v{i}]" for i in range(len(crop_filters))) + f"vstack=inputs={len(crop_filters)}[out]"
-                
-                cmd = [
-                    'ffmpeg',
-                    '-i', str(video_file),
-                    '-filter_complex', filter_complex,
-                    '-map', '[out]',
-                    '-map', '0:a',
-                    '-c:a', 'copy',
-                    '-y',
-                    str(output_file)
-                ]
-        
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print(f"✓ Saved: {output_file.name}")
-                successful += 1
-            else:
-                print("✗ FFmpeg error:")
-                print(result.stderr)
-                failed += 1
-                
-        except Exception as e:
-            print(f"✗ Exception: {e}")
+        jobs.append((video_file, scene_type, num_speakers))
+    
+    # 2. Render: one clip per worker, results printed as each one finishes
+    workers = max(1, min(MAX_WORKERS, len(jobs)))
+    if jobs:
+        print("\n" + "=" * 60)
+        print(f"\nRendering {len(jobs)} video(s) ({workers} in parallel)...")
+    
+    def record(video_file, ok):
+        nonlocal successful, failed
+        if ok:
+            successful += 1
+        elif ok is False:
             failed += 1
     
+    if workers == 1:
+        # Single clip: render in-process with live progress
+        for video_file, scene_type, _ in jobs:
+            print(f"\n{video_file.name}")
+            try:
+                ok, output_files, stderr = render_scenes(video_file, scene_type, num_speakers, output_dir,
+                                                         on_progress=print_progress, parts=SPLIT_PARTS)
+                report_render(ok, output_files, stderr)
+            except Exception as e:
+                print(f"✗ Exception: {e}")
+                ok = False
+            record(video_file, ok)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(render_job, job) for job in jobs]
+            for future in as_completed(futures):
+                video_file, ok, log, _ = future.result()
+                print(f"\n{video_file.name}")
+                print(log)
+                record(video_file, ok)
+    
     print("\n" + "=" * 60)
     print("\n=== Summary ===")
-    print(f"Total: {len(video_files)} | ✓ Success: {successful} | ✗ Failed: {failed}")
+    print(f"Total: {len(video_files)} | ✓ Success: {successful} | ⊗ Up-to-date: {skipped} | ✗ Failed: {failed}")
     print(f"\nCropped videos saved to: {output_dir}")
 
 if __name__ == "__main__":
@@ -1,8 +1,15 @@
+import bisect
+import importlib
 import json
-import subprocess
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 import re
 
+from ffmpeg_utils import FFMPEG, encoder_name, hwaccel_args, require_ffmpeg, run_ffmpeg, video_encoder_args
+from pipeline_state import partial_path
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent  # Go up two levels: steps -> scripts -> project root
@@ -15,6 +22,22 @@ TRANSCRIPTS_DIR = OUTPUT_DIR / "transcripts"
 
 CLIPS_JSON = READ_AI_DIR / "clips.json"
 
+# Parallel burn-in across clips: up to half the cores as workers, each ffmpeg
+# limited to FFMPEG_THREADS encoder threads so workers x threads fits the CPU
+MAX_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+FFMPEG_THREADS = 4
+
+# ============= SUBTITLE CONFIGURATION =============
+SUBTITLE_CONFIG = {
+    # Word-by-word karaoke highlight (\k tags). Off by default: plain lines let libass
+    # reuse each line's rendered glyphs instead of redrawing the highlight every frame.
+    # Enable with --karaoke.
+    'karaoke': False,
+    'chunk_seconds': 1.2,  # Plain lines: max time span of one subtitle line
+    'pause_seconds': 0.3,  # A longer gap between words always starts a new line
+}
+# ==================================================
+
 # Find the first transcript JSON file in the transcripts directory
 transcript_files = [f for f in TRANSCRIPTS_DIR.glob("*_transcript.json") if f.is_file()]
 
@@ -35,8 +58,8 @@ def seconds_to_ass_time(seconds):
     centiseconds = int((seconds % 1) * 100)
     return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
 
-def create_ass_subtitle(words, clip_start_time, output_path):
-    """Create an ASS subtitle file with karaoke effect
+def create_ass_subtitle(words, clip_start_time, output_path, karaoke=None):
+    """Create an ASS subtitle file, with karaoke effect when karaoke (default: SUBTITLE_CONFIG) is on
     
     Customization options:
     - Font: Change 'Montserrat' to any installed font
@@ -58,8 +81,8 @@ def create_ass_subtitle(words, clip_start_time, output_path):
     - Blue: &H00FF0000
     """
     
-    # ASS file header with styling
-    ass_content = """[Script Info]
+    # ASS file header with styling (lines are collected in a list and joined once)
+    ass_parts = ["""[Script Info]
 Title: Podcast Subtitle
 ScriptType: v4.00+
 WrapStyle: 0
@@ -73,31 +96,44 @@ Style: Default,Montserrat,80,&H00FFFFFF,&H0000FFFF,&H00000000,&H80000000,-1,0,0,
 
 [Events]
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
+"""]
+    
+    if karaoke is None:
+        karaoke = SUBTITLE_CONFIG['karaoke']
+    pause_seconds = SUBTITLE_CONFIG['pause_seconds']
     
-    # Group words into subtitle chunks (every 3-5 words or by pauses)
     subtitle_chunks = []
     current_chunk = []
     
-    for i, word_data in enumerate(words):
-        current_chunk.append(word_data)
-        
-        # Create a new chunk every 4 words or if there's a pause
-        if len(current_chunk) >= 4:
-            subtitle_chunks.append(current_chunk)
-            current_chunk = []
-        elif i < len(words) - 1:
-            # Check for pause (gap > 0.3 seconds)
-            next_word = words[i + 1]
-            if next_word['start'] - word_data['end'] > 0.3:
+    if karaoke:
+        # Group words into subtitle chunks (every 3-5 words or by pauses)
+        for i, word_data in enumerate(words):
+            current_chunk.append(word_data)
+            
+            # Create a new chunk every 4 words or if there's a pause
+            if len(current_chunk) >= 4:
+                subtitle_chunks.append(current_chunk)
+                current_chunk = []
+            elif i < len(words) - 1:
+                # Check for pause (gap > 0.3 seconds)
+                next_word = words[i + 1]
+                if next_word['start'] - word_data['end'] > pause_seconds:
+                    subtitle_chunks.append(current_chunk)
+                    current_chunk = []
+    else:
+        # Group words into time windows (fewer, longer lines), also split on pauses
+        for word_data in words:
+            if current_chunk and (word_data['end'] - current_chunk[0]['start'] > SUBTITLE_CONFIG['chunk_seconds']
+                                  or word_data['start'] - current_chunk[-1]['end'] > pause_seconds):
                 subtitle_chunks.append(current_chunk)
                 current_chunk = []
+            current_chunk.append(word_data)
     
     # Add remaining words
     if current_chunk:
         subtitle_chunks.append(current_chunk)
     
-    # Generate ASS dialogue lines with karaoke effect
+    # Generate ASS dialogue lines
     for chunk in subtitle_chunks:
         if not chunk:
             continue
@@ -110,59 +146,202 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         if start_time < 0 or end_time < 0:
             continue
         
-        # Build karaoke text
-        karaoke_text = ""
-        for word_data in chunk:
-            word = word_data['word']
-            word_start = word_data['start'] - clip_start_time - start_time
-            word_duration = word_data['end'] - word_data['start']
-            
-            # Karaoke effect: \k<duration in centiseconds>
-            duration_cs = int(word_duration * 100)
-            karaoke_text += f"{{\\k{duration_cs}}}{word} "
+        if karaoke:
+            # Build karaoke text - karaoke effect: \k<duration in centiseconds> per word
+            text = ' '.join(f"{{\\k{int((word_data['end'] - word_data['start']) * 100)}}}{word_data['word']}"
+                            for word_data in chunk)
+        else:
+            text = ' '.join(word_data['word'] for word_data in chunk)
         
         # Format: Dialogue: Layer,Start,End,Style,Name,MarginL,MarginR,MarginV,Effect,Text
-        dialogue = f"Dialogue: 0,{seconds_to_ass_time(start_time)},{seconds_to_ass_time(end_time)},Default,,0,0,0,,{karaoke_text.strip()}\n"
-        ass_content += dialogue
+        ass_parts.append(f"Dialogue: 0,{seconds_to_ass_time(start_time)},{seconds_to_ass_time(end_time)},Default,,0,0,0,,{text.strip()}\n")
     
     # Write to file
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(ass_content)
+        f.write(''.join(ass_parts))
     
     return output_path
 
-def add_subtitles_to_videos():
-    """Add ASS subtitles to videos in ready_for_subs folder"""
+def parse_clip_windows(clips):
+    """
+    {clip_number: (title, start_seconds, end_seconds)} with the times parsed once.
+    The first entry wins for duplicate clip numbers; unparsable times are stored
+    as None and reported when that clip is processed.
+    """
+    clip_windows = {}
+    for clip in clips:
+        try:
+            start_time = parse_timestamp(clip['start_time'])
+            end_time = parse_timestamp(clip['end_time'])
+        except (KeyError, TypeError, ValueError):
+            start_time = end_time = None
+        clip_windows.setdefault(clip.get('clip_number'), (clip.get('title', 'Unknown'), start_time, end_time))
+    return clip_windows
+
+@lru_cache(maxsize=1)
+def load_clips_and_words():
+    """
+    Load clips.json and every word (with timestamps) from the transcript (once per process).
+    Returns (clip_windows, all_words, word_starts): the clips from parse_clip_windows(),
+    words sorted by start time, and their start times as a separate list so a clip's
+    words are found by binary search.
+    """
+    with open(CLIPS_JSON, 'r', encoding='utf-8') as f:
+        clip_windows = parse_clip_windows(json.load(f))
+    
+    with open(TRANSCRIPT_JSON, 'r', encoding='utf-8') as f:
+        transcript = json.load(f)
+    
+    all_words = []
+    for segment in transcript.get('segments', []):
+        for word_data in segment.get('words', []):
+            if 'start' in word_data:  # Words WhisperX couldn't align have no timestamps
+                all_words.append(word_data)
+    
+    all_words.sort(key=lambda w: w['start'])  # Usually already in order
+    word_starts = [w['start'] for w in all_words]
+    
+    return clip_windows, all_words, word_starts
+
+def write_clip_subtitles(video_file, clip_windows, all_words, word_starts, ass_file, log, karaoke=None):
+    """
+    Write the .ass file for the clip video_file was cut from (clip_XX_ in its name).
+    Returns True when written, None when the clip has no metadata/words (reason in log).
+    """
+    # Extract clip number from filename (clip_XX_...)
+    match = re.search(r'clip_(\d+)_', video_file.name)
+    if not match:
+        log.append(f"   ⚠ Skipping {video_file.name} - couldn't parse clip number\n")
+        return None
+    
+    clip_num = int(match.group(1))
+    
+    # Find matching clip metadata
+    window = clip_windows.get(clip_num)
+    if not window:
+        log.append(f"   ⚠ Skipping clip {clip_num} - no metadata found\n")
+        return None
+    
+    title, start_time, end_time = window
+    log.append(f"   Clip {clip_num}: {title[:50]}...")
+    if start_time is None:
+        raise ValueError(f"invalid start_time/end_time for clip {clip_num} in clips.json")
+    
+    # Get words within this clip's timeframe
+    clip_words = all_words[bisect.bisect_left(word_starts, start_time):bisect.bisect_right(word_starts, end_time)]
+    
+    if not clip_words:
+        log.append("   ⚠ No words found for this clip time range\n")
+        return None
+    
+    log.append(f"   Found {len(clip_words)} words in clip")
+    
+    create_ass_subtitle(clip_words, start_time, ass_file, karaoke)
+    log.append(f"   ✓ Generated subtitles: {ass_file.name}")
+    return True
+
+# Clips/words handed to each pool worker once by _init_worker (not pickled with every job)
+_WORKER_STATE = {}
+
+def _init_worker(clip_windows, all_words, word_starts, karaoke):
+    """ProcessPoolExecutor initializer: keep the loaded clips/words (and subtitle style) for every job of this worker"""
+    _WORKER_STATE['data'] = (clip_windows, all_words, word_starts)
+    SUBTITLE_CONFIG['karaoke'] = karaoke
+
+def process_one(video_file, clip_windows=None, all_words=None, word_starts=None):
+    """
+    Burn subtitles into one cropped video.
+    Returns (ok, log, output_file) - ok is None when the video was skipped.
+    When not given, clip_windows/all_words/word_starts come from the pool initializer,
+    or are loaded from disk (pipeline workers).
+    """
+    if clip_windows is None or all_words is None or word_starts is None:
+        clip_windows, all_words, word_starts = _WORKER_STATE.get('data') or load_clips_and_words()
+    
+    log = []
     
-    print("=== Adding Karaoke Subtitles to Videos ===\n")
+    try:
+        # Generate ASS subtitle file (temporary, in READY_DIR)
+        ass_file = READY_DIR / f"{video_file.stem}.ass"
+        if not write_clip_subtitles(video_file, clip_windows, all_words, word_starts, ass_file, log):
+            return None, '\n'.join(log), None
+        
+        # Create output with subtitles burned in (save to RELEASE_DIR)
+        RELEASE_DIR.mkdir(parents=True, exist_ok=True)
+        output_file = RELEASE_DIR / f"{video_file.stem}_subtitled.mp4"
+        
+        # Hardware decode/encode when available; decoded frames come back in system
+        # memory, so the ass filter (CPU only) works unchanged
+        cmd = [
+            FFMPEG,
+            *hwaccel_args(),
+            '-i', str(video_file),
+            '-vf', f"ass={ass_file.name}",
+            *video_encoder_args(['-c:v', 'libx264', '-threads', str(FFMPEG_THREADS)]),
+            '-c:a', 'copy',
+            '-y',
+            str(output_file)
+        ]
+        
+        # Run from READY_DIR to use relative path for ass file
+        ok, stderr = run_ffmpeg(cmd, cwd=READY_DIR)
+        
+        if ok:
+            log.append(f"   ✓ Subtitled video saved: {output_file.name}")
+            # Delete .ass file since subtitles are now burned into video
+            ass_file.unlink()
+            log.append("   ✓ Cleaned up temporary .ass file\n")
+            return True, '\n'.join(log), output_file
+        
+        log.append("   ✗ FFmpeg error:")
+        log.append(f"   {stderr[-300:]}\n")
+        return False, '\n'.join(log), None
+            
+    except Exception as e:
+        log.append(f"   ✗ Error: {e}\n")
+        return False, '\n'.join(log), None
+
+def crop_and_subtitle_one(clip_file, num_speakers, karaoke=None):
+    """
+    Pipeline entry point (--stream): crop one extracted clip and burn its subtitles
+    in the same FFmpeg run - one decode and one encode per clip, and no
+    intermediate cropped video. Returns (ok, log, output_files).
+    """
+    crop = importlib.import_module("3_crop_to_vertical")
+    clip_windows, all_words, word_starts = load_clips_and_words()
     
-    # Load clips metadata
-    print("1. Loading clips data...")
+    log = []
+    ass_file = partial_path(RELEASE_DIR / f"{clip_file.stem}.ass")
     try:
-        with open(CLIPS_JSON, 'r', encoding='utf-8') as f:
-            clips = json.load(f)
-        print(f"   ✓ Found {len(clips)} clips\n")
+        ok = write_clip_subtitles(clip_file, clip_windows, all_words, word_starts, ass_file, log, karaoke)
     except Exception as e:
-        print(f"   ✗ Error loading clips: {e}")
-        return
+        log.append(f"   ✗ Error: {e}\n")
+        return False, '\n'.join(log), []
+    if not ok:
+        return ok, '\n'.join(log), []
+    
+    try:
+        ok, crop_log, output_files = crop.process_one(clip_file, num_speakers, output_dir=RELEASE_DIR, ass_file=ass_file)
+    finally:
+        ass_file.unlink(missing_ok=True)
+    return ok, '\n'.join(log) + crop_log, output_files
+
+def add_subtitles_to_videos():
+    """Add ASS subtitles to videos in ready_for_subs folder"""
+    
+    print(f"=== Adding {'Karaoke ' if SUBTITLE_CONFIG['karaoke'] else ''}Subtitles to Videos ===\n")
+    require_ffmpeg()
     
-    # Load transcript
-    print("2. Loading transcript...")
+    # Load clips metadata and transcript
+    print("1. Loading clips data and transcript...")
     try:
-        with open(TRANSCRIPT_JSON, 'r', encoding='utf-8') as f:
-            transcript = json.load(f)
-        print(f"   ✓ Loaded transcript with {len(transcript.get('segments', []))} segments\n")
+        clip_windows, all_words, word_starts = load_clips_and_words()
+        print(f"   ✓ Found {len(clip_windows)} clips\n")
     except Exception as e:
-        print(f"   ✗ Error loading transcript: {e}")
+        print(f"   ✗ Error loading clips/transcript: {e}")
         return
     
-    # Extract all words with timestamps
-    all_words = []
-    for segment in transcript.get('segments', []):
-        for word_data in segment.get('words', []):
-            all_words.append(word_data)
-    
-    print(f"   ✓ Found {len(all_words)} words with timestamps\n")
+    print(f"2. ✓ Found {len(all_words)} words with timestamps\n")
     
     # Create release directory if it doesn't exist
     RELEASE_DIR.mkdir(parents=True, exist_ok=True)
@@ -174,85 +353,33 @@ def add_subtitles_to_videos():
         print(f"   ✗ No videos found in {READY_DIR}")
         return
     
-    print(f"3. Processing {len(video_files)} video(s)...\n")
+    workers = max(1, min(MAX_WORKERS, len(video_files)))
+    print(f"3. Processing {len(video_files)} video(s) ({workers} in parallel, encoder: {encoder_name()})...\n")
     
     successful = 0
     failed = 0
     
-    for video_file in video_files:
-        # Extract clip number from filename (clip_XX_...)
-        match = re.search(r'clip_(\d+)_', video_file.name)
-        if not match:
-            print(f"   ⚠ Skipping {video_file.name} - couldn't parse clip number\n")
-            continue
-        
-        clip_num = int(match.group(1))
-        
-        # Find matching clip metadata
-        clip_data = next((c for c in clips if c.get('clip_number') == clip_num), None)
-        if not clip_data:
-            print(f"   ⚠ Skipping clip {clip_num} - no metadata found\n")
-            continue
-        
-        print(f"   Clip {clip_num}: {clip_data.get('title', 'Unknown')[:50]}...")
-        
-        try:
-            # Parse clip times
-            start_time = parse_timestamp(clip_data['start_time'])
-            end_time = parse_timestamp(clip_data['end_time'])
-            
-            # Get words within this clip's timeframe
-            clip_words = [
-                w for w in all_words
-                if start_time <= w['start'] <= end_time
-            ]
-            
-            if not clip_words:
-                print("   ⚠ No words found for this clip time range\n")
-                continue
-            
-            print(f"   Found {len(clip_words)} words in clip")
-            
-            # Generate ASS subtitle file (temporary, in READY_DIR)
-            ass_file = READY_DIR / f"{video_file.stem}.ass"
-            create_ass_subtitle(clip_words, start_time, ass_file)
-            print(f"   ✓ Generated subtitles: {ass_file.name}")
-            
-            # Create output with subtitles burned in (save to RELEASE_DIR)
-            output_file = RELEASE_DIR / f"{video_file.stem}_subtitled.mp4"
-            
-            cmd = [
-                'ffmpeg',
-                '-i', str(video_file),
-                '-vf', f"ass={ass_file.name}",
-                '-c:a', 'copy',
-                '-y',
-                str(output_file)
-            ]
-            
-            # Run from READY_DIR to use relative path for ass file
-            result = subprocess.run(
-                cmd,
-                cwd=READY_DIR,
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                print(f"   ✓ Subtitled video saved: {output_file.name}")
-                # Delete .ass file since subtitles are now burned into video
-                ass_file.unlink()
-                print("   ✓ Cleaned up temporary .ass file\n")
-                successful += 1
-            else:
-                print("   ✗ FFmpeg error:")
-                print(f"   {result.stderr[:300]}\n")
-                failed += 1
-                
-        except Exception as e:
-            print(f"   ✗ Error: {e}\n")
+    def record(ok, log):
+        nonlocal successful, failed
+        print(log)
+        if ok:
+            successful += 1
+        elif ok is False:
             failed += 1
     
+    if workers == 1:
+        for video_file in video_files:
+            ok, log, _ = process_one(video_file, clip_windows, all_words, word_starts)
+            record(ok, log)
+    else:
+        # Workers get the clips/words once at startup; jobs only carry the video path
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(clip_windows, all_words, word_starts, SUBTITLE_CONFIG['karaoke'])) as executor:
+            futures = [executor.submit(process_one, video_file) for video_file in video_files]
+            for future in as_completed(futures):
+                ok, log, _ = future.result()
+                record(ok, log)
+    
     print("=" * 60)
     print("\n=== Summary ===")
     print(f"Total videos: {len(video_files)}")
@@ -261,4 +388,11 @@ def add_subtitles_to_videos():
     print(f"\nSubtitled videos saved to: {RELEASE_DIR}")
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Burn subtitles into the cropped videos")
+    parser.add_argument("--karaoke", action="store_true",
+                        help="Word-by-word karaoke highlight (slower to render)")
+    SUBTITLE_CONFIG['karaoke'] = parser.parse_args().karaoke or SUBTITLE_CONFIG['karaoke']
+    
     add_subtitles_to_videos()
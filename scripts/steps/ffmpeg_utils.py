@@ -0,0 +1,166 @@
+"""
+Shared FFmpeg helpers for the pipeline steps.
+
+Hardware encoder detection runs once per process and is cached: the
+encoder has to be listed by `ffmpeg -encoders` AND survive a one-frame
+test encode (being compiled in doesn't mean the GPU/driver is there).
+Anything that fails falls back to libx264.
+"""
+import shutil
+import subprocess
+import sys
+import threading
+from collections import deque
+from functools import lru_cache
+
+# Resolved once: argv[0] is an absolute path, so no PATH search per spawned process
+FFMPEG = shutil.which('ffmpeg') or 'ffmpeg'
+FFPROBE = shutil.which('ffprobe') or 'ffprobe'
+
+# ============= ENCODER CONFIGURATION =============
+ENCODER_CONFIG = {
+    'use_hardware': True,  # Set to False to always encode with libx264
+}
+
+# Hardware H.264 encoders in order of preference, with their quality settings
+# and the matching -hwaccel decoder. Frames are decoded on the device and
+# handed back in system memory, so the CPU crop/stack filters keep working.
+HW_ENCODERS = [
+    {
+        'name': 'h264_nvenc',  # NVIDIA
+        'hwaccel': 'cuda',
+        'args': ['-c:v', 'h264_nvenc', '-preset', 'p4', '-tune', 'hq', '-rc', 'vbr', '-cq', '23', '-b:v', '0'],
+    },
+    {
+        'name': 'h264_videotoolbox',  # macOS
+        'hwaccel': 'videotoolbox',
+        'args': ['-c:v', 'h264_videotoolbox', '-q:v', '65'],
+    },
+    {
+        'name': 'h264_qsv',  # Intel Quick Sync
+        'hwaccel': 'qsv',
+        'args': ['-c:v', 'h264_qsv', '-global_quality', '23'],
+    },
+]
+# ==================================================
+
+FF_QP2LAMBDA = 118  # libavutil's quality scale -> lambda factor (what ffmpeg applies to -q:v)
+
+def run_ffmpeg(cmd, on_progress=None, cwd=None, tail_lines=20):
+    """
+    Run an FFmpeg command without buffering its whole stderr in memory:
+    only the last tail_lines lines are kept for error messages.
+    on_progress(seconds) is called with the encoded position (via -progress).
+    Returns (ok, stderr_tail).
+    """
+    if on_progress is not None:
+        cmd = [cmd[0], '-progress', 'pipe:1', '-nostats', *cmd[1:]]
+
+    proc = subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,  # Never let ffmpeg eat keystrokes meant for our prompts
+        stdout=subprocess.PIPE if on_progress else subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    tail = deque(maxlen=tail_lines)
+
+    def drain_stderr():
+        for line in proc.stderr:
+            tail.append(line.rstrip())
+
+    if on_progress is None:
+        drain_stderr()
+    else:
+        # Both pipes must be drained at once or ffmpeg can block on a full one
+        reader = threading.Thread(target=drain_stderr, daemon=True)
+        reader.start()
+        for line in proc.stdout:
+            if line.startswith('out_time_us='):
+                value = line.split('=', 1)[1].strip()
+                if value.isdigit():  # 'N/A' until the first frame is out
+                    on_progress(int(value) / 1_000_000)
+        reader.join()
+
+    proc.wait()
+    return proc.returncode == 0, '\n'.join(tail)
+
+@lru_cache(maxsize=1)
+def require_ffmpeg():
+    """Fail fast with a clear message if ffmpeg/ffprobe can't run, instead of failing per clip"""
+    for tool in (FFMPEG, FFPROBE):
+        ok, _ = _run_quiet([tool, '-version'])
+        if not ok:
+            sys.exit(f"✗ {tool} not found or not working - install FFmpeg and make sure it's on PATH")
+
+def _run_quiet(cmd):
+    """Run a command, returning (ok, stdout) and swallowing missing-binary errors"""
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, errors='replace')
+    except OSError:
+        return False, ''
+    return result.returncode == 0, result.stdout
+
+@lru_cache(maxsize=1)
+def detect_hw_encoder():
+    """Return the first working hardware encoder entry from HW_ENCODERS, or None"""
+    if not ENCODER_CONFIG['use_hardware']:
+        return None
+
+    ok, encoders = _run_quiet([FFMPEG, '-hide_banner', '-encoders'])
+    if not ok:
+        return None
+
+    for encoder in HW_ENCODERS:
+        if encoder['name'] not in encoders:
+            continue
+
+        # Test-encode a single frame to make sure the device is usable
+        ok, _ = _run_quiet([
+            FFMPEG, '-hide_banner', '-loglevel', 'error',
+            '-f', 'lavfi', '-i', 'color=black:s=256x256:d=0.1',
+            '-frames:v', '1',
+            *encoder['args'],
+            '-f', 'null', '-'
+        ])
+        if ok:
+            return encoder
+
+    return None
+
+def hwaccel_args():
+    """Input-side hardware decode arguments (go before -i)"""
+    encoder = detect_hw_encoder()
+    return ['-hwaccel', encoder['hwaccel']] if encoder else []
+
+def video_encoder_args(software_args):
+    """Hardware encoder arguments if available, otherwise software_args (libx264)"""
+    encoder = detect_hw_encoder()
+    return list(encoder['args']) if encoder else list(software_args)
+
+def encoder_codec_options(software_args):
+    """
+    The encoder as (codec_name, options) for in-process encoding with PyAV,
+    translated from the same CLI arguments video_encoder_args() returns.
+    """
+    args = video_encoder_args(software_args)
+    codec_name = args[args.index('-c:v') + 1]
+    options = {}
+    for flag, value in zip(args[::2], args[1::2]):
+        if flag == '-c:v':
+            continue
+        if flag == '-q:v':
+            # Not an AVOption: the CLI turns it into global_quality (in lambda units) + the qscale flag
+            options['global_quality'] = str(round(float(value) * FF_QP2LAMBDA))
+            options['flags'] = '+qscale'
+        else:
+            options[flag.lstrip('-').split(':')[0]] = value  # '-b:v' -> 'b'
+    return codec_name, options
+
+def encoder_name():
+    """Human readable name of the encoder that will be used"""
+    encoder = detect_hw_encoder()
+    return encoder['name'] if encoder else 'libx264'
@@ -0,0 +1,76 @@
+"""
+Per-item progress for the pipeline steps.
+
+run_pipeline.py records which steps finished in output/pipeline_state.json;
+the steps themselves record which clips they already produced under
+state["steps"][<step number>], so a resumed run only redoes what is missing:
+
+    {"completed_steps": [1, 2], "steps": {"3": {"source": [...], "done_clip_nums": [1, 2]}}}
+
+"source" identifies the inputs the progress was recorded for (see source_signature):
+progress recorded for another clips.json or video is ignored and replaced.
+
+Outputs are written under a .partial/ folder and renamed into place once
+FFmpeg succeeded, so an existing output file is always a complete one.
+"""
+import json
+import os
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent  # steps -> scripts -> project root
+STATE_FILE = PROJECT_ROOT / "output" / "pipeline_state.json"
+
+def load_state():
+    """Load the pipeline state (empty state if missing or unreadable)"""
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {"completed_steps": [], "steps": {}, "last_run": None}
+    state.setdefault("steps", {})
+    return state
+
+def save_state(state):
+    """Write the state atomically (temp file + rename) so a crash never leaves it half-written"""
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = STATE_FILE.with_suffix('.tmp')
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_file, STATE_FILE)
+
+def source_signature(*paths):
+    """[[path, size, mtime_ns], ...] of the input files a step's progress belongs to"""
+    signature = []
+    for path in paths:
+        st = os.stat(path)
+        signature.append([str(path), st.st_size, st.st_mtime_ns])
+    return signature
+
+def get_done(step, key, source):
+    """Set of items already done for a step from the same source, e.g. get_done(3, 'done_clip_nums', source)"""
+    progress = load_state().get("steps", {}).get(str(step), {})
+    if progress.get("source") != source:
+        return set()  # Recorded for other inputs (or by an older version)
+    return set(progress.get(key, []))
+
+def mark_done(step, key, item, source):
+    """Record one finished item for a step (dropping progress recorded for another source)"""
+    state = load_state()
+    progress = state.setdefault("steps", {}).setdefault(str(step), {})
+    if progress.get("source") != source:
+        progress.clear()
+        progress["source"] = source
+    done = progress.setdefault(key, [])
+    if item not in done:
+        done.append(item)
+        save_state(state)
+
+def output_exists(output_file):
+    """True if a (complete) output file is already there"""
+    return output_file.exists() and output_file.stat().st_size > 0
+
+def partial_path(output_file):
+    """Where FFmpeg writes output_file until it's complete (skipped by the *.mp4 globs)"""
+    partial_dir = output_file.parent / ".partial"
+    partial_dir.mkdir(parents=True, exist_ok=True)
+    return partial_dir / output_file.name
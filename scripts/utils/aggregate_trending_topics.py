@@ -8,6 +8,8 @@ Output: Single JSON file with aggregated, deduplicated, and scored trends.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from pathlib import Path
 from datetime import datetime
@@ -15,6 +17,13 @@ import re
 import os
 from dotenv import load_dotenv
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+try:
+    import orjson  # Optional: much faster JSON parsing/serialization
+except ImportError:
+    orjson = None
 
 # Load environment variables
 load_dotenv()
@@ -30,6 +39,34 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 # Configuration
 YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
 
+# One pooled session for every API call: keep-alive connections are reused
+# across requests to the same host, and 429/5xx answers are retried with backoff
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+))
+SESSION.headers.update({'User-Agent': 'Gaming Trends Aggregator 2.0'})
+
+# Patterns used for every title, compiled once
+_TAG_RE = re.compile(r'\[.*?\]')
+_PAREN_RE = re.compile(r'\(.*?\)')
+_SUFFIX_RE = re.compile(r'\s*-\s*(Gameplay|Trailer|Review|Guide|Update).*$', re.IGNORECASE)
+_SPECIAL_RE = re.compile(r'[^\w\s:-]')
+_DOUBLE_RE = re.compile(r'"([^"]+)"')
+_SINGLE_RE = re.compile(r"'([^']+)'")
+_TITLE_CASE_RE = re.compile(r'\b(?:[A-Z][a-z]+\s*){2,}(?:[A-Z][a-z]+)?\b')
+_WORD_RE = re.compile(r'\b[a-z]{4,}\b')
+
+# Common non-game words
+_EXCLUDE_WORDS = frozenset({
+    'gameplay', 'trailer', 'review', 'episode', 'part', 'live', 'stream',
+    'guide', 'tutorial', 'tips', 'tricks', 'update', 'news', 'español',
+    'pc', 'ps5', 'xbox', 'nintendo', 'switch', 'gaming', 'game', 'games',
+    'video', 'channel', 'subscribe', 'like', 'comentar'
+})
+
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
@@ -37,56 +74,42 @@ YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
 def clean_game_name(name):
     """Clean and normalize game names"""
     # Remove brackets and parentheses content
-    name = re.sub(r'\[.*?\]', '', name)
-    name = re.sub(r'\(.*?\)', '', name)
+    name = _TAG_RE.sub('', name)
+    name = _PAREN_RE.sub('', name)
     
     # Remove common suffixes
-    name = re.sub(r'\s*-\s*(Gameplay|Trailer|Review|Guide|Update).*$', '', name, flags=re.IGNORECASE)
+    name = _SUFFIX_RE.sub('', name)
     
     # Remove special characters but keep alphanumeric and spaces
-    name = re.sub(r'[^\w\s:-]', '', name)
+    name = _SPECIAL_RE.sub('', name)
     
     # Clean up whitespace
     name = ' '.join(name.split())
     
     return name.strip()
 
-def is_valid_game_name(name):
-    """Filter out non-game names"""
+def is_valid_game_name(name, lowered=None):
+    """Filter out non-game names (lowered: name.lower() when the caller already has it)"""
     if len(name) < 3:
         return False
     
     # Exclude common non-game words
-    exclude_words = {
-        'gameplay', 'trailer', 'review', 'episode', 'part', 'live', 'stream',
-        'guide', 'tutorial', 'tips', 'tricks', 'update', 'news', 'español',
-        'pc', 'ps5', 'xbox', 'nintendo', 'switch', 'gaming', 'game', 'games',
-        'video', 'channel', 'subscribe', 'like', 'comentar'
-    }
-    
-    if name.lower() in exclude_words:
+    if (lowered or name.lower()) in _EXCLUDE_WORDS:
         return False
     
-    # Must have at least one letter
-    if not re.search(r'[a-zA-Z]', name):
-        return False
-    
-    return True
+    # Must have at least one (ASCII) letter
+    return any(c.isascii() and c.isalpha() for c in name)
 
 def extract_game_names_from_text(text):
     """Extract potential game names from text"""
     games = set()
     
-    # Look for quoted names
-    quoted = re.findall(r'"([^"]+)"', text)
-    games.update(quoted)
-    
-    quoted = re.findall(r"'([^']+)'", text)
-    games.update(quoted)
+    # Look for quoted names (separate scans, so an apostrophe can't swallow a "double" quoted name)
+    games.update(_DOUBLE_RE.findall(text))
+    games.update(_SINGLE_RE.findall(text))
     
     # Look for title case phrases (3+ words)
-    title_case = re.findall(r'\b(?:[A-Z][a-z]+\s*){2,}(?:[A-Z][a-z]+)?\b', text)
-    games.update(title_case)
+    games.update(_TITLE_CASE_RE.findall(text))
     
     # Clean and filter
     cleaned = set()
@@ -101,6 +124,25 @@ def extract_game_names_from_text(text):
 # REDDIT SCRAPER
 # ============================================================================
 
+def _fetch_one_sub(subreddit):
+    """Popular hot posts of one subreddit as (subreddit, [post data], error or None) - no shared state"""
+    try:
+        url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit=25"
+        response = SESSION.get(url, timeout=10)
+        
+        posts = []
+        if response.status_code == 200:
+            data = orjson.loads(response.content) if orjson else response.json()
+            
+            if 'data' in data and 'children' in data['data']:
+                # Only consider popular posts
+                posts = [post['data'] for post in data['data']['children']
+                         if post['data'].get('score', 0) > 100]
+        return subreddit, posts, None
+    
+    except Exception as e:
+        return subreddit, [], e
+
 def fetch_reddit_trends():
     """Fetch trending gaming topics from Reddit"""
     print("📱 Fetching from Reddit...")
@@ -113,48 +155,39 @@ def fetch_reddit_trends():
     
     subreddits = ["gaming", "Games", "pcgaming", "PS5", "xbox", "NintendoSwitch"]
     
-    for subreddit in subreddits:
-        try:
-            url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit=25"
-            headers = {'User-Agent': 'Gaming Trends Aggregator 2.0'}
-            response = requests.get(url, headers=headers, timeout=10)
+    # Requests run in parallel (I/O bound); results are merged here, in subreddit order
+    with ThreadPoolExecutor(max_workers=len(subreddits)) as executor:
+        for subreddit, posts, error in executor.map(_fetch_one_sub, subreddits):
+            if error is not None:
+                print(f"   ✗ r/{subreddit}: {error}")
+                continue
             
-            if response.status_code == 200:
-                data = response.json()
+            for post_data in posts:
+                title = post_data.get('title', '')
+                score = post_data.get('score', 0)
+                
+                # Store top posts
+                results["top_posts"].append({
+                    "title": title,
+                    "score": score,
+                    "subreddit": subreddit,
+                    "url": f"https://reddit.com{post_data.get('permalink', '')}"
+                })
+                
+                # Extract game names
+                games = extract_game_names_from_text(title)
+                for game in games:
+                    results["games"][game]["score"] += score
+                    results["games"][game]["count"] += 1
+                    results["games"][game]["posts"].append(title[:100])
                 
-                if 'data' in data and 'children' in data['data']:
-                    for post in data['data']['children']:
-                        post_data = post['data']
-                        title = post_data.get('title', '')
-                        score = post_data.get('score', 0)
-                        
-                        # Only consider popular posts
-                        if score > 100:
-                            # Store top posts
-                            results["top_posts"].append({
-                                "title": title,
-                                "score": score,
-                                "subreddit": subreddit,
-                                "url": f"https://reddit.com{post_data.get('permalink', '')}"
-                            })
-                            
-                            # Extract game names
-                            games = extract_game_names_from_text(title)
-                            for game in games:
-                                results["games"][game]["score"] += score
-                                results["games"][game]["count"] += 1
-                                results["games"][game]["posts"].append(title[:100])
-                            
-                            # Extract keywords
-                            words = re.findall(r'\b[a-z]{4,}\b', title.lower())
-                            for word in words:
-                                if is_valid_game_name(word):
-                                    results["keywords"][word] += score
+                # Extract keywords
+                words = _WORD_RE.findall(title.lower())
+                for word in words:
+                    if is_valid_game_name(word, word):  # Already lowercase
+                        results["keywords"][word] += score
             
             print(f"   ✓ r/{subreddit}")
-        
-        except Exception as e:
-            print(f"   ✗ r/{subreddit}: {e}")
     
     # Sort top posts
     results["top_posts"].sort(key=lambda x: x["score"], reverse=True)
@@ -183,7 +216,7 @@ def fetch_steam_trends():
     try:
         # Get featured categories
         url = "https://store.steampowered.com/api/featuredcategories/?cc=ES&l=spanish"
-        response = requests.get(url, timeout=10)
+        response = SESSION.get(url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -267,7 +300,7 @@ def fetch_youtube_trends():
             'key': YOUTUBE_API_KEY
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = SESSION.get(url, params=params, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -316,63 +349,56 @@ def fetch_youtube_trends():
 # AGGREGATION
 # ============================================================================
 
+# Score weight of each source, in score_table column order
+SOURCES = ("Reddit", "Steam", "YouTube")
+SOURCE_WEIGHTS = np.array([0.3, 0.4, 0.3])
+
 def aggregate_results(reddit_data, steam_data, youtube_data):
     """Combine and score all results"""
     print("🔄 Aggregating results...\n")
     
-    # Combine all games
-    all_games = defaultdict(lambda: {
-        "score": 0,
+    # One [reddit, steam, youtube] score row per game, plus the non-score details,
+    # filled in a single pass over the three sources
+    score_table = defaultdict(lambda: [0, 0, 0])
+    details = defaultdict(lambda: {
         "sources": set(),
         "mentions": 0,
-        "reddit_score": 0,
-        "steam_score": 0,
-        "youtube_score": 0,
         "categories": set(),
         "sample_posts": []
     })
     
-    # Add Reddit data
-    for game, data in reddit_data["games"].items():
-        all_games[game]["score"] += data["score"] * 0.3  # 30% weight
-        all_games[game]["reddit_score"] = data["score"]
-        all_games[game]["mentions"] += data["count"]
-        all_games[game]["sources"].add("Reddit")
-        all_games[game]["sample_posts"].extend(data["posts"][:2])
-    
-    # Add Steam data
-    for game, data in steam_data["games"].items():
-        all_games[game]["score"] += data["score"] * 0.4  # 40% weight
-        all_games[game]["steam_score"] = data["score"]
-        all_games[game]["sources"].add("Steam")
-        all_games[game]["categories"].update(data["category"])
-    
-    # Add YouTube data
-    for game, data in youtube_data["games"].items():
-        all_games[game]["score"] += data["score"] * 0.3  # 30% weight
-        all_games[game]["youtube_score"] = data["score"]
-        all_games[game]["sources"].add("YouTube")
-        all_games[game]["sample_posts"].extend(data["videos"][:2])
-    
-    # Convert to list and sort
+    source_games = (reddit_data["games"], steam_data["games"], youtube_data["games"])
+    for column, (source, games) in enumerate(zip(SOURCES, source_games)):
+        for game, data in games.items():
+            score_table[game][column] = data["score"]
+            info = details[game]
+            info["sources"].add(source)
+            info["mentions"] += data.get("count", 0)  # Reddit only
+            info["categories"].update(data.get("category", ()))  # Steam only
+            info["sample_posts"].extend(data.get("posts", data.get("videos", []))[:2])  # Reddit posts / YouTube videos
+    
+    # Weighted totals for every game at once, ranked with one (stable) argsort
+    names = list(score_table)
+    totals = np.round(np.array(list(score_table.values()), dtype=float).reshape(-1, 3) @ SOURCE_WEIGHTS, 2)
+    
     games_list = []
-    for game, data in all_games.items():
+    for i in np.argsort(-totals, kind='stable'):
+        game = names[i]
+        reddit_score, steam_score, youtube_score = score_table[game]
+        info = details[game]
         games_list.append({
             "name": game,
-            "total_score": round(data["score"], 2),
-            "sources": sorted(list(data["sources"])),
-            "source_count": len(data["sources"]),
-            "mentions": data["mentions"],
-            "reddit_score": round(data["reddit_score"], 2),
-            "steam_score": round(data["steam_score"], 2),
-            "youtube_score": round(data["youtube_score"], 2),
-            "categories": sorted(list(data["categories"])),
-            "sample_posts": data["sample_posts"][:3]
+            "total_score": float(totals[i]),
+            "sources": sorted(info["sources"]),
+            "source_count": len(info["sources"]),
+            "mentions": info["mentions"],
+            "reddit_score": round(reddit_score, 2),
+            "steam_score": round(steam_score, 2),
+            "youtube_score": round(youtube_score, 2),
+            "categories": sorted(info["categories"]),
+            "sample_posts": info["sample_posts"][:3]
         })
     
-    # Sort by score
-    games_list.sort(key=lambda x: x["total_score"], reverse=True)
-    
     return games_list
 
 # ============================================================================
@@ -387,10 +413,14 @@ def main():
     
     start_time = datetime.now()
     
-    # Fetch from all sources
-    reddit_data = fetch_reddit_trends()
-    steam_data = fetch_steam_trends()
-    youtube_data = fetch_youtube_trends()
+    # Fetch from all sources at once (network bound - progress lines may interleave)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        reddit_future = executor.submit(fetch_reddit_trends)
+        steam_future = executor.submit(fetch_steam_trends)
+        youtube_future = executor.submit(fetch_youtube_trends)
+        reddit_data = reddit_future.result()
+        steam_data = steam_future.result()
+        youtube_data = youtube_future.result()
     
     # Aggregate
     trending_games = aggregate_results(reddit_data, steam_data, youtube_data)
@@ -415,8 +445,11 @@ def main():
     }
     
     # Save to file
-    with open(TRENDS_FILE, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    if orjson:
+        TRENDS_FILE.write_bytes(orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(TRENDS_FILE, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
     
     # Print summary
     print("=" * 70)
@@ -5,14 +5,19 @@ print(f"PyTorch version: {torch.__version__}")
 print(f"CUDA available: {torch.cuda.is_available()}")
 
 if torch.cuda.is_available():
+    torch.cuda.init()  # Initialize CUDA once up front instead of lazily on the first query
+    device = 0
+    props = torch.cuda.get_device_properties(device)  # Queried once, reused below
+    
     print(f"CUDA version: {torch.version.cuda}")
-    print(f"GPU device: {torch.cuda.get_device_name(0)}")
-    print(f"GPU memory: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f} GB")
+    print(f"GPU device: {props.name}")
+    print(f"GPU memory: {props.total_memory / 1024**3:.2f} GB")
     print(f"Number of GPUs: {torch.cuda.device_count()}")
     
     # Check current memory usage
-    print(f"\nCurrent GPU memory allocated: {torch.cuda.memory_allocated(0) / 1024**3:.2f} GB")
-    print(f"Current GPU memory reserved: {torch.cuda.memory_reserved(0) / 1024**3:.2f} GB")
+    with torch.cuda.device(device):
+        print(f"\nCurrent GPU memory allocated: {torch.cuda.memory_allocated() / 1024**3:.2f} GB")
+        print(f"Current GPU memory reserved: {torch.cuda.memory_reserved() / 1024**3:.2f} GB")
 else:
     print("WARNING: CUDA is not available. The script will run on CPU (very slow).")
     print("\nPlease install PyTorch with CUDA support:")
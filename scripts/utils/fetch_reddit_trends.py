@@ -3,6 +3,13 @@ import json
 from pathlib import Path
 from datetime import datetime
 import re
+import heapq
+from collections import Counter
+
+try:
+    import orjson  # Optional: much faster JSON parsing/serialization
+except ImportError:
+    orjson = None
 
 # Paths
 SCRIPT_DIR = Path(__file__).parent
@@ -34,101 +41,110 @@ subreddits = [
 game_indicators = ['trailer', 'gameplay', 'review', 'release', 'announced', 'update', 
                    'patch', 'dlc', 'expansion', 'gameplay', 'screenshots']
 
+# Title patterns (compiled once, used for every post)
+_TAG_RE = re.compile(r'\[.*?\]')
+_PAREN_RE = re.compile(r'\(.*?\)')
+_DOUBLE_RE = re.compile(r'"([^"]+)"')
+_SINGLE_RE = re.compile(r"'([^']+)'")
+_WORD_RE = re.compile(r'\b[a-z]{4,}\b')
+
+# Common words ignored when ranking trending keywords
+_STOPWORDS = frozenset({'game', 'games', 'gaming', 'with', 'that', 'this', 'from',
+                        'have', 'been', 'will', 'about', 'what', 'does', 'when'})
+
 def extract_game_names(title):
     """Try to extract potential game names from post titles"""
     # Remove common prefixes
-    title = re.sub(r'\[.*?\]', '', title)  # Remove [tags]
-    title = re.sub(r'\(.*?\)', '', title)  # Remove (parentheses)
-    
-    # Look for quoted game names
-    quoted = re.findall(r'"([^"]+)"', title)
-    if quoted:
-        return quoted
+    title = _TAG_RE.sub('', title)  # Remove [tags]
+    title = _PAREN_RE.sub('', title)  # Remove (parentheses)
     
-    quoted = re.findall(r"'([^']+)'", title)
-    if quoted:
-        return quoted
-    
-    return []
+    # Look for quoted game names (double quotes first: apostrophes in
+    # contractions like "Don't" would otherwise open a bogus single-quoted match)
+    return _DOUBLE_RE.findall(title) or _SINGLE_RE.findall(title)
 
 all_posts = []
 discovered_games = set()
 
-# Fetch hot posts from each subreddit
-for subreddit in subreddits:
-    print(f"Fetching from r/{subreddit}...")
+# Fetch hot posts from all subreddits in a single multireddit request (r/gaming+Games+...):
+# one round-trip, one TLS handshake and one JSON parse instead of one per subreddit
+multireddit = '+'.join(subreddits)
+posts_count = dict.fromkeys(subreddits, 0)
+print(f"Fetching from r/{multireddit}...")
+
+try:
+    url = f"https://www.reddit.com/r/{multireddit}/hot.json?limit=100"  # 100 is Reddit's maximum page size
+    headers = {'User-Agent': 'Gaming Trends Scraper 1.0'}
+    response = requests.get(url, headers=headers, timeout=10)
     
-    try:
-        url = f"https://www.reddit.com/r/{subreddit}/hot.json?limit=25"
-        headers = {'User-Agent': 'Gaming Trends Scraper 1.0'}
-        response = requests.get(url, headers=headers, timeout=10)
+    if response.status_code == 200:
+        data = orjson.loads(response.content) if orjson else response.json()
         
-        if response.status_code == 200:
-            data = response.json()
-            posts_count = 0
-            
-            if 'data' in data and 'children' in data['data']:
-                for post in data['data']['children']:
-                    post_data = post['data']
-                    title = post_data.get('title', '')
-                    score = post_data.get('score', 0)
-                    num_comments = post_data.get('num_comments', 0)
-                    
-                    # Only include posts with decent engagement
-                    if score > 100:
-                        all_posts.append({
-                            'title': title,
-                            'score': score,
-                            'comments': num_comments,
-                            'subreddit': subreddit,
-                            'url': f"https://reddit.com{post_data.get('permalink', '')}"
-                        })
-                        
-                        # Try to extract game names
-                        game_names = extract_game_names(title)
-                        for game in game_names:
-                            if len(game) > 3:  # Avoid acronyms that are too short
-                                discovered_games.add(game)
-                        
-                        posts_count += 1
+        if 'data' in data and 'children' in data['data']:
+            # Only include posts with decent engagement (rejected before touching any other field)
+            hot = [post['data'] for post in data['data']['children'] if post['data'].get('score', 0) > 100]
             
-            print(f"   Found {posts_count} trending posts\n")
-        else:
-            print(f"   Error: Status code {response.status_code}\n")
-    
-    except Exception as e:
-        print(f"   Error: {e}\n")
-
-# Sort posts by score
-all_posts.sort(key=lambda x: x['score'], reverse=True)
-
-# Get top posts
-trending_data["trends"]["top_posts"] = all_posts[:20]
+            for post_data in hot:
+                subreddit = post_data.get('subreddit', '')
+                title = post_data.get('title', '')
+                
+                # Lightweight tuple per post: only the top 20 become dicts for the JSON.
+                # The title is lowercased/tokenized once here, for all later analysis
+                all_posts.append((post_data['score'], title, post_data.get('num_comments', 0),
+                                  subreddit, post_data.get('permalink', ''), _WORD_RE.findall(title.lower())))
+                
+                # Try to extract game names
+                game_names = extract_game_names(title)
+                for game in game_names:
+                    if len(game) > 3:  # Avoid acronyms that are too short
+                        discovered_games.add(game)
+                
+                posts_count[subreddit] = posts_count.get(subreddit, 0) + 1
+        
+        print()
+        for subreddit, count in posts_count.items():
+            print(f"r/{subreddit}: Found {count} trending posts")
+        print()
+    else:
+        print(f"   Error: Status code {response.status_code}\n")
+
+except Exception as e:
+    print(f"   Error: {e}\n")
+
+# Get top posts by score (partial selection, no full sort needed)
+trending_data["trends"]["top_posts"] = [
+    {
+        'title': title,
+        'score': score,
+        'comments': num_comments,
+        'subreddit': subreddit,
+        'url': f"https://reddit.com{permalink}"
+    }
+    for score, title, num_comments, subreddit, permalink, _ in heapq.nlargest(20, all_posts, key=lambda x: x[0])
+]
 trending_data["trends"]["discovered_games"] = sorted(list(discovered_games))
 
 # Extract trending topics from titles
 print("Analyzing trending topics...")
-word_freq = {}
+word_freq = Counter()
 
-for post in all_posts:
-    title = post['title'].lower()
+for score, *_, words in all_posts:
     # Remove common words
-    words = re.findall(r'\b[a-z]{4,}\b', title)
-    
     for word in words:
-        if word not in ['game', 'games', 'gaming', 'with', 'that', 'this', 'from', 
-                       'have', 'been', 'will', 'about', 'what', 'does', 'when']:
-            word_freq[word] = word_freq.get(word, 0) + post['score']
+        if word not in _STOPWORDS:
+            word_freq[word] += score
 
 # Get top trending words
-trending_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:20]
+trending_words = heapq.nlargest(20, word_freq.items(), key=lambda x: x[1])
 trending_data["trends"]["trending_keywords"] = [word for word, _ in trending_words]
 
 print(f"   Top trending keywords: {', '.join(trending_data['trends']['trending_keywords'][:10])}\n")
 
 # Save to JSON
-with open(TRENDS_FILE, "w", encoding="utf-8") as f:
-    json.dump(trending_data, f, indent=2, ensure_ascii=False)
+if orjson:
+    TRENDS_FILE.write_bytes(orjson.dumps(trending_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+else:
+    with open(TRENDS_FILE, "w", encoding="utf-8") as f:
+        json.dump(trending_data, f, indent=2, ensure_ascii=False)
 
 print(f"✓ Saved trends to: {TRENDS_FILE}")
 print("\n=== Summary ===")
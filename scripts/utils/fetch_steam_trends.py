@@ -1,8 +1,16 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson  # Optional: much faster JSON parsing/serialization
+except ImportError:
+    orjson = None
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
@@ -12,6 +20,11 @@ TRENDS_FILE = OUTPUT_DIR / "trending_topics.json"
 # Create output directory if it doesn't exist
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# One keep-alive session for every Steam request: TLS is negotiated once per
+# connection and reused, with enough pooled connections for the parallel lookups
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.2)))
+
 print("=== Fetching Gaming Trends from Steam API ===\n")
 
 trending_data = {
@@ -20,15 +33,24 @@ trending_data = {
     "trends": {}
 }
 
+def fetch_featured_categories():
+    """Steam Store featured categories (top sellers, new releases, ...) as (data, error) - fetched once for steps 1 and 3"""
+    try:
+        url = "https://store.steampowered.com/api/featuredcategories/?cc=ES&l=spanish"
+        response = SESSION.get(url, timeout=10)
+        if response.status_code != 200:
+            return None, f"Status code {response.status_code}"
+        return response.json(), None
+    except Exception as e:
+        return None, e
+
+featured, featured_error = fetch_featured_categories()
+
 # 1. Get top sellers from Steam
 print("1. Fetching top sellers...")
 try:
-    # Steam Store API - Featured games (includes top sellers)
-    url = "https://store.steampowered.com/api/featuredcategories/?cc=ES&l=spanish"
-    response = requests.get(url, timeout=10)
-    
-    if response.status_code == 200:
-        data = response.json()
+    if featured is not None:
+        data = featured
         
         # Get top sellers
         top_sellers = []
@@ -45,45 +67,53 @@ try:
         trending_data["trends"]["top_sellers"] = top_sellers
         print(f"   Total: {len(top_sellers)} games\n")
     else:
-        print(f"   Error: Status code {response.status_code}\n")
+        print(f"   Error: {featured_error}\n")
         trending_data["trends"]["top_sellers"] = []
 except Exception as e:
     print(f"   Error: {e}\n")
     trending_data["trends"]["top_sellers"] = []
 
+def fetch_one_appdetails(appid):
+    """Game name for a Steam appid from the store API, or None"""
+    try:
+        game_url = f"https://store.steampowered.com/api/appdetails?appids={appid}&cc=ES&l=spanish"
+        game_response = SESSION.get(game_url, timeout=5)
+        
+        if game_response.status_code == 200:
+            game_data = game_response.json()
+            if str(appid) in game_data and game_data[str(appid)]['success']:
+                return game_data[str(appid)]['data']['name']
+    except Exception:
+        pass
+    return None
+
 # 2. Get most played games
 print("2. Fetching most played games...")
 try:
     # Steam Spy API alternative - using Steam Charts data
     # Note: This gets top games by player count
     url = "https://api.steampowered.com/ISteamChartsService/GetMostPlayedGames/v1/"
-    response = requests.get(url, timeout=10)
+    response = SESSION.get(url, timeout=10)
     
     if response.status_code == 200:
         data = response.json()
         most_played = []
         
         if 'response' in data and 'ranks' in data['response']:
-            for rank_data in data['response']['ranks'][:15]:
-                appid = rank_data.get('appid')
-                
-                # Get game name from Steam store API
-                try:
-                    game_url = f"https://store.steampowered.com/api/appdetails?appids={appid}&cc=ES&l=spanish"
-                    game_response = requests.get(game_url, timeout=5)
-                    
-                    if game_response.status_code == 200:
-                        game_data = game_response.json()
-                        if str(appid) in game_data and game_data[str(appid)]['success']:
-                            game_name = game_data[str(appid)]['data']['name']
-                            most_played.append({
-                                "name": game_name,
-                                "appid": appid,
-                                "rank": rank_data.get('rank')
-                            })
-                            print(f"   - #{rank_data.get('rank')}: {game_name}")
-                except Exception:
-                    pass
+            ranks = data['response']['ranks'][:15]
+            
+            # Get game names from Steam store API, all requests at once (results stay in rank order)
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                game_names = list(executor.map(fetch_one_appdetails, [rank_data.get('appid') for rank_data in ranks]))
+            
+            for rank_data, game_name in zip(ranks, game_names):
+                if game_name is not None:
+                    most_played.append({
+                        "name": game_name,
+                        "appid": rank_data.get('appid'),
+                        "rank": rank_data.get('rank')
+                    })
+                    print(f"   - #{rank_data.get('rank')}: {game_name}")
         
         trending_data["trends"]["most_played"] = most_played
         print(f"   Total: {len(most_played)} games\n")
@@ -111,11 +141,8 @@ except Exception as e:
 # 3. Get new releases
 print("3. Fetching new and trending releases...")
 try:
-    url = "https://store.steampowered.com/api/featuredcategories/?cc=ES&l=spanish"
-    response = requests.get(url, timeout=10)
-    
-    if response.status_code == 200:
-        data = response.json()
+    if featured is not None:
+        data = featured
         
         # Get new releases
         new_releases = []
@@ -131,7 +158,7 @@ try:
         trending_data["trends"]["new_releases"] = new_releases
         print(f"   Total: {len(new_releases)} games\n")
     else:
-        print(f"   Error: Status code {response.status_code}\n")
+        print(f"   Error: {featured_error}\n")
         trending_data["trends"]["new_releases"] = []
 except Exception as e:
     print(f"   Error: {e}\n")
@@ -154,8 +181,11 @@ trending_data["trends"]["all_trending_games"] = sorted(list(all_games))
 print(f"   Total unique games: {len(all_games)}\n")
 
 # Save to JSON
-with open(TRENDS_FILE, "w", encoding="utf-8") as f:
-    json.dump(trending_data, f, indent=2, ensure_ascii=False)
+if orjson:
+    TRENDS_FILE.write_bytes(orjson.dumps(trending_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+else:
+    with open(TRENDS_FILE, "w", encoding="utf-8") as f:
+        json.dump(trending_data, f, indent=2, ensure_ascii=False)
 
 print(f"✓ Saved trends to: {TRENDS_FILE}")
 print("\n=== Summary ===")
@@ -1,11 +1,18 @@
 import requests
+import bisect
 import json
+from operator import itemgetter
 from pathlib import Path
 from datetime import datetime
 import re
 import os
 from dotenv import load_dotenv
 
+try:
+    import orjson  # Optional: much faster JSON parsing/serialization
+except ImportError:
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
@@ -32,16 +39,42 @@ trending_data = {
     "trends": {}
 }
 
-def extract_game_names(title):
-    """Try to extract potential game names from video titles"""
-    # Look for quoted game names
-    quoted = re.findall(r'"([^"]+)"', title)
-    if quoted:
-        return quoted
+# Title patterns (compiled once). Titles are scanned joined by _TITLE_SEP, which
+# no match can span: it's neither a letter nor whitespace, and quotes exclude it
+_TITLE_SEP = '\x00'
+_QUOTE_RE = re.compile(r'"([^"\x00]+)"')
+_CAPS_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+
+# Common non-game words
+EXCLUDE = frozenset({'Gameplay', 'Trailer', 'Review', 'Episode', 'Part', 'Live', 'Stream',
+                     'Guide', 'Tutorial', 'Tips', 'Tricks', 'Update', 'News', 'Español'})
+
+def _matches_by_title(pattern, joined, starts):
+    """Group every match of pattern in the joined titles by the title it's in"""
+    groups = [[] for _ in starts]
+    for match in pattern.finditer(joined):
+        groups[bisect.bisect_right(starts, match.start()) - 1].append(match.group(match.lastindex or 0))
+    return groups
+
+def extract_game_names(titles):
+    """
+    Try to extract potential game names from video titles: a list of names per title.
+    All titles are scanned in one pass per pattern instead of one regex run per title.
+    """
+    starts = []
+    offset = 0
+    for title in titles:
+        starts.append(offset)
+        offset += len(title) + len(_TITLE_SEP)
+    joined = _TITLE_SEP.join(titles)
     
-    # Look for capitalized words (likely game names)
-    capitalized = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', title)
-    return capitalized[:3]  # Limit to first 3
+    # Look for quoted game names, else capitalized words (likely game names)
+    quoted = _matches_by_title(_QUOTE_RE, joined, starts)
+    capitalized = _matches_by_title(_CAPS_RE, joined, starts)
+    return [names if names else caps[:3] for names, caps in zip(quoted, capitalized)]  # Limit to first 3
+
+# Every game name found by steps 1 and 2, for the combined list in step 3
+all_games = set()
 
 # 1. Get trending gaming videos
 print("1. Fetching trending gaming videos...")
@@ -64,7 +97,8 @@ try:
         discovered_games = set()
         
         if 'items' in data:
-            for item in data['items']:
+            titles = [item['snippet']['title'] for item in data['items']]
+            for item, games in zip(data['items'], extract_game_names(titles)):
                 snippet = item['snippet']
                 stats = item['statistics']
                 
@@ -78,17 +112,17 @@ try:
                 
                 trending_videos.append(video_info)
                 
-                # Extract game names
-                games = extract_game_names(snippet['title'])
+                # Game names extracted from the title
                 for game in games:
                     if len(game) > 3:
                         discovered_games.add(game)
             
             # Sort by views
-            trending_videos.sort(key=lambda x: x['views'], reverse=True)
+            trending_videos.sort(key=itemgetter('views'), reverse=True)
             
             trending_data['trends']['trending_videos'] = trending_videos[:20]
-            trending_data['trends']['discovered_games'] = sorted(list(discovered_games))
+            trending_data['trends']['discovered_games'] = sorted(discovered_games)
+            all_games.update(discovered_games)
             
             print(f"   Found {len(trending_videos)} trending videos")
             print(f"   Discovered {len(discovered_games)} potential game names\n")
@@ -148,41 +182,39 @@ for keyword in search_keywords:
                     }
                     
                     all_search_results.append(result)
-                    
-                    # Extract game names
-                    games = extract_game_names(snippet['title'])
-                    for game in games:
-                        if len(game) > 3:
-                            keyword_games.add(game)
                 
                 print(f"   '{keyword}': Found {len(data['items'])} results")
         
     except Exception as e:
         print(f"   Error searching '{keyword}': {e}")
 
+# Extract game names from every search result title at once
+for games in extract_game_names([result['title'] for result in all_search_results]):
+    for game in games:
+        if len(game) > 3:
+            keyword_games.add(game)
+all_games.update(keyword_games)
+
 print(f"   Total search results: {len(all_search_results)}\n")
 
 trending_data['trends']['search_results'] = all_search_results
-trending_data['trends']['keyword_discovered_games'] = sorted(list(keyword_games))
+trending_data['trends']['keyword_discovered_games'] = sorted(keyword_games)
 
 # 3. Combine all discovered games
 print("3. Compiling all discovered games...")
-all_games = set()
-all_games.update(trending_data['trends']['discovered_games'])
-all_games.update(trending_data['trends']['keyword_discovered_games'])
-
-# Filter out common non-game words
-exclude_words = ['Gameplay', 'Trailer', 'Review', 'Episode', 'Part', 'Live', 'Stream',
-                'Guide', 'Tutorial', 'Tips', 'Tricks', 'Update', 'News', 'Español']
 
-filtered_games = [game for game in all_games if game not in exclude_words and len(game) > 2]
+# Filter out common non-game words (one filter + sort over the set filled above)
+filtered_games = sorted(game for game in all_games if len(game) > 2 and game not in EXCLUDE)
 
-trending_data['trends']['all_discovered_games'] = sorted(filtered_games)
+trending_data['trends']['all_discovered_games'] = filtered_games
 print(f"   Total unique games: {len(filtered_games)}\n")
 
 # Save to JSON
-with open(TRENDS_FILE, "w", encoding="utf-8") as f:
-    json.dump(trending_data, f, indent=2, ensure_ascii=False)
+if orjson:
+    TRENDS_FILE.write_bytes(orjson.dumps(trending_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+else:
+    with open(TRENDS_FILE, "w", encoding="utf-8") as f:
+        json.dump(trending_data, f, indent=2, ensure_ascii=False)
 
 print(f"✓ Saved trends to: {TRENDS_FILE}")
 print("\n=== Summary ===")
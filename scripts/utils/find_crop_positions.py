@@ -1,38 +1,129 @@
 import cv2
 import numpy as np
 import subprocess
+import time
+from functools import lru_cache, partial
 from pathlib import Path
 
+try:
+    import av  # PyAV (optional): decode the frame in-process
+except ImportError:
+    av = None
+
+# Frames wider than this are shown downscaled (positions are still in original pixels)
+DISPLAY_MAX_WIDTH = 1600
+
+# How long the GUI loop sleeps when there was no event (~60 Hz)
+IDLE_POLL_SECONDS = 0.016
+
+# cv2.pollKey (OpenCV 4.5+) returns immediately; older versions fall back to a 1 ms waitKey
+poll_key = getattr(cv2, 'pollKey', lambda: cv2.waitKey(1))
+
+# On-screen controls help, drawn at (10, INSTRUCTIONS_TOP) with INSTRUCTIONS_LINE_HEIGHT between lines
+INSTRUCTIONS = [
+    "CONTROLS:",
+    "N = Change # of speakers",
+    "S/C = Scene (Speakers/Content)",
+    "1-5 = Select position",
+    "V = Toggle vertical/horizontal",
+    "+/- = Adjust width",
+    "Left Click = Set position",
+    "Right Click = Pixel color",
+    "P = Print config",
+    "Q = Quit"
+]
+INSTRUCTIONS_TOP = 70  # Baseline of the first line
+INSTRUCTIONS_LINE_HEIGHT = 25
+
+def render_instructions_sprite():
+    """
+    Render the instructions once: returns (alpha, top), where alpha is the text
+    coverage (see blend_text) and top is the display row of the sprite's first row.
+    """
+    top = INSTRUCTIONS_TOP - INSTRUCTIONS_LINE_HEIGHT
+    width = max(cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)[0][0] for line in INSTRUCTIONS) + 2
+    sprite = np.zeros((INSTRUCTIONS_LINE_HEIGHT * (len(INSTRUCTIONS) + 1), width), dtype=np.uint8)
+    
+    y_offset = INSTRUCTIONS_TOP - top
+    for instruction in INSTRUCTIONS:
+        cv2.putText(sprite, instruction, 
+                   (0, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 255, 1)
+        y_offset += INSTRUCTIONS_LINE_HEIGHT
+    
+    return sprite[:, :, None].astype(np.uint32), top
+
+@lru_cache(maxsize=64)
+def text_sprite(text, font_scale, thickness):
+    """
+    Render a label once: returns (alpha, dx, dy), where alpha is the text coverage
+    and (dx, dy) is the sprite's top-left corner relative to the text origin.
+    """
+    (width, height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+    pad = thickness + 1  # Strokes spill past getTextSize's box by about half the thickness
+    sprite = np.zeros((height + baseline + 2 * pad, width + 2 * pad), dtype=np.uint8)
+    cv2.putText(sprite, text, (pad, pad + height), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 255, thickness)
+    return sprite[:, :, None].astype(np.uint32), -pad, -(pad + height)
+
+def blend_text(region, alpha, color):
+    """
+    Paint color into region (in place) weighted by alpha (0-255 text coverage).
+    With OpenCV's non anti-aliased text alpha is only ever 0 or 255, so the
+    pixels are exactly what cv2.putText would have drawn.
+    """
+    region[:] = (region * (255 - alpha) + np.array(color, dtype=np.uint32) * alpha + 127) // 255
+
+def put_cached_text(display, text, org, font_scale, color, thickness):
+    """cv2.putText from a cached sprite, clipped to display"""
+    alpha, dx, dy = text_sprite(text, font_scale, thickness)
+    left, top = org[0] + dx, org[1] + dy
+    x0, y0 = max(left, 0), max(top, 0)
+    x1 = min(left + alpha.shape[1], display.shape[1])
+    y1 = min(top + alpha.shape[0], display.shape[0])
+    if x0 < x1 and y0 < y1:
+        sx, sy = x0 - left, y0 - top
+        blend_text(display[y0:y1, x0:x1], alpha[sy:sy + y1 - y0, sx:sx + x1 - x0], color)
+
+def extract_frame_av(video_path, time_sec=5):
+    """
+    Decode the keyframe at/just before time_sec in-process with PyAV: dimensions come
+    from the decoded frame, so there's no ffprobe/ffmpeg subprocess at all, and
+    non-keyframes are never decoded (any frame near time_sec works as a reference).
+    """
+    with av.open(str(video_path)) as container:
+        stream = container.streams.video[0]
+        stream.codec_context.skip_frame = 'NONKEY'
+        container.seek(int(time_sec / stream.time_base), stream=stream)
+        frame = next(container.decode(stream))
+        return frame.to_ndarray(format='bgr24')
+
 def extract_frame(video_path, time_sec=5):
     """Extract a frame from the video at specified time"""
+    if av is not None:
+        try:
+            return extract_frame_av(video_path, time_sec)
+        except Exception as e:
+            print(f"⚠ PyAV decode failed ({e}), falling back to ffmpeg")
+    
+    # -ss before -i seeks the input to the nearest keyframe instead of decoding
+    # everything from the start of the file, and -skip_frame nokey decodes keyframes
+    # only (like the PyAV path, any frame near time_sec will do). The frame comes
+    # back as a PNG, which carries its own size, so no separate ffprobe call is needed.
     cmd = [
         'ffmpeg',
-        '-i', str(video_path),
+        '-skip_frame', 'nokey',
         '-ss', str(time_sec),
-        '-vframes', '1',
+        '-i', str(video_path),
+        '-frames:v', '1',
         '-f', 'image2pipe',
-        '-pix_fmt', 'bgr24',
-        '-vcodec', 'rawvideo',
+        '-vcodec', 'png',
         '-'
     ]
     
     try:
         result = subprocess.run(cmd, capture_output=True, check=True)
-        # Get video dimensions
-        probe_cmd = [
-            'ffprobe',
-            '-v', 'error',
-            '-select_streams', 'v:0',
-            '-show_entries', 'stream=width,height',
-            '-of', 'csv=p=0',
-            str(video_path)
-        ]
-        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True)
-        width, height = map(int, probe_result.stdout.strip().split(','))
-        
-        # Decode the raw video frame
-        frame = np.frombuffer(result.stdout, dtype=np.uint8)
-        frame = frame.reshape((height, width, 3))
+        frame = cv2.imdecode(np.frombuffer(result.stdout, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise RuntimeError("ffmpeg returned no decodable frame")
         
         return frame
     except Exception as e:
@@ -41,8 +132,13 @@ def extract_frame(video_path, time_sec=5):
 
 class CropPositionFinder:
     def __init__(self, image):
-        self.image = image.copy()
-        self.original = image.copy()
+        self.original = image  # Read-only: draw_overlay paints on its own copy
+        # Everything is drawn on a downscaled copy; mouse input is mapped back to original pixels
+        self.scale = min(1, DISPLAY_MAX_WIDTH / image.shape[1])
+        if self.scale < 1:
+            self.display_src = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        else:
+            self.display_src = image
         self.mouse_x = 0
         self.mouse_y = 0
         self.crop_x = 0
@@ -93,7 +189,50 @@ class CropPositionFinder:
             {'x': 1760, 'y': 969, 'width': 738, 'vertical': False}
         ]
         
+        # (num_speakers, scene_type) -> list of region dicts (the same dicts, edited in place)
+        self._crop_tables = {
+            (3, 'speakers'): self.crop_3_speakers,
+            (3, 'content'): [self.crop_3_content],  # Wrap in list for consistent handling
+            (4, 'speakers'): self.crop_4_speakers,
+            (4, 'content'): self.crop_4_content,
+            (5, 'speakers'): self.crop_5_speakers,
+            (5, 'content'): self.crop_5_content,
+        }
+        
+        # Every region carries 'vertical', so lookups can index it directly
+        for config in self._crop_tables.values():
+            for region in config:
+                region.setdefault('vertical', False)
+        
         self.selected_region = 0  # Current region being edited
+        
+        # Crop areas, labels and instructions only change on clicks/key presses:
+        # they're drawn once into this cache, mouse moves only add the crosshair
+        self._static_cache = None
+        self._cache_dirty = True
+        self._dirty = True  # Anything (mouse or keys) changed since the last imshow
+        self._last_mouse = (-1, -1)  # Position coord_text was formatted for
+        self._coord_text = ""
+        
+        # Key code -> handler, looked up once per key press in run()
+        self._key_handlers = {
+            ord('n'): self.choose_num_speakers,
+            ord('s'): partial(self.set_scene, 'speakers'),
+            ord('c'): partial(self.set_scene, 'content'),
+            ord('v'): self.toggle_vertical,
+            ord('+'): partial(self.adjust_width, 10),
+            ord('='): partial(self.adjust_width, 10),
+            ord('-'): partial(self.adjust_width, -10),
+            ord('_'): partial(self.adjust_width, -10),
+            ord('p'): self.print_config,
+        }
+        for region_idx in range(5):
+            self._key_handlers[ord(str(region_idx + 1))] = partial(self.select_region, region_idx)
+        
+        # Frame-sized scratch buffers, allocated once and refilled with np.copyto
+        self._static_buffer = np.empty_like(self.display_src)
+        self._display_buffer = np.empty_like(self.display_src)
+        self._instructions_sprite = render_instructions_sprite()
     
     def calculate_height(self, width, vertical=False):
         """Calculate height based on 16:9 aspect ratio"""
@@ -104,59 +243,40 @@ class CropPositionFinder:
             # Landscape: 16:9 ratio (width:height)
             return int(width * 9 / 16)
     
-    def get_crop_with_dimensions(self, crop):
-        """Get crop dict with calculated height"""
-        return {
-            'x': crop['x'],
-            'y': crop['y'],
-            'width': crop['width'],
-            'height': self.calculate_height(crop['width'], crop.get('vertical', False))
-        }
-        
     def get_current_crops(self):
         """Get the current crop configuration based on speaker count and scene type"""
-        if self.num_speakers == 3:
-            if self.scene_type == 'speakers':
-                return self.crop_3_speakers
-            else:
-                return [self.crop_3_content]  # Wrap in list for consistent handling
-        elif self.num_speakers == 4:
-            return self.crop_4_speakers if self.scene_type == 'speakers' else self.crop_4_content
-        else:  # 5 speakers
-            return self.crop_5_speakers if self.scene_type == 'speakers' else self.crop_5_content
+        return self._crop_tables[(self.num_speakers, self.scene_type)]
     
     def set_crop_position(self, region_idx, x, y):
         """Set the position for a specific crop region"""
-        if self.num_speakers == 3:
-            if self.scene_type == 'speakers':
-                self.crop_3_speakers[region_idx]['x'] = x
-                self.crop_3_speakers[region_idx]['y'] = y
-            else:
-                self.crop_3_content['x'] = x
-                self.crop_3_content['y'] = y
-        elif self.num_speakers == 4:
-            if self.scene_type == 'speakers':
-                self.crop_4_speakers[region_idx]['x'] = x
-                self.crop_4_speakers[region_idx]['y'] = y
-            else:
-                self.crop_4_content[region_idx]['x'] = x
-                self.crop_4_content[region_idx]['y'] = y
-        else:  # 5 speakers
-            if self.scene_type == 'speakers':
-                self.crop_5_speakers[region_idx]['x'] = x
-                self.crop_5_speakers[region_idx]['y'] = y
-            else:
-                self.crop_5_content[region_idx]['x'] = x
-                self.crop_5_content[region_idx]['y'] = y
+        region = self.get_current_crops()[region_idx]
+        region['x'] = x
+        region['y'] = y
+    
+    def to_display(self, value):
+        """Original pixel coordinate/size -> displayed image pixels"""
+        return int(value * self.scale)
+    
+    def tint_region(self, display, x1, y1, x2, y2, color, alpha):
+        """Blend color into the rectangle only (in place), instead of blending a full-frame copy"""
+        roi = display[max(0, y1):max(0, y2 + 1), max(0, x1):max(0, x2 + 1)]  # View, clipped to the frame
+        if roi.size:
+            tint = np.full_like(roi, color)
+            cv2.addWeighted(tint, alpha, roi, 1 - alpha, 0, roi)
     
     def mouse_callback(self, event, x, y, flags, param):
         """Track mouse position and clicks"""
+        # Window coordinates are in the downscaled image
+        x = int(x / self.scale)
+        y = int(y / self.scale)
         self.mouse_x = x
         self.mouse_y = y
+        self._dirty = True
         
         if event == cv2.EVENT_LBUTTONDOWN:
+            self._cache_dirty = True
             crops = self.get_current_crops()
-            if self.num_speakers == 3 and self.scene_type == 'content':
+            if self.is_single_content():
                 # Single crop for 3-speaker content
                 self.set_crop_position(0, x, y)
                 print(f"\n✓ 3-Speaker Content crop position updated: x={x}, y={y}")
@@ -175,38 +295,65 @@ class CropPositionFinder:
     
     def draw_overlay(self):
         """Draw crop areas on the image"""
-        display = self.original.copy()
+        if self._cache_dirty or self._static_cache is None:
+            self._static_cache = self.draw_static_layer()
+            self._cache_dirty = False
+        display = self._display_buffer
+        np.copyto(display, self._static_cache)
+        
+        # Draw mouse crosshair
+        mx, my = self.to_display(self.mouse_x), self.to_display(self.mouse_y)
+        # 1px axis-aligned lines are just a column and a row (skipped when the mouse is outside)
+        if 0 <= mx < display.shape[1]:
+            display[:, mx] = (0, 255, 255)
+        if 0 <= my < display.shape[0]:
+            display[my, :] = (0, 255, 255)
+        
+        # Draw mouse coordinates (reformatted only when the mouse moved, not on key presses)
+        if (self.mouse_x, self.mouse_y) != self._last_mouse:
+            self._last_mouse = (self.mouse_x, self.mouse_y)
+            self._coord_text = f"Mouse: ({self.mouse_x}, {self.mouse_y})"
+        cv2.putText(display, self._coord_text, 
+                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+        
+        return display
+    
+    def draw_static_layer(self):
+        """Crop areas, labels, instructions and mode text (everything but the mouse overlay)"""
+        display = self._static_buffer
+        np.copyto(display, self.display_src)
         
         crops = self.get_current_crops()
         
         # Special case: 3 speakers content scene (single crop)
-        if self.num_speakers == 3 and self.scene_type == 'content':
-            crop = self.get_crop_with_dimensions(crops[0])
-            x, y = crop['x'], crop['y']
-            w, h = crop['width'], crop['height']
-            is_vertical = crops[0].get('vertical', False)
+        if self.is_single_content():
+            crop = crops[0]
+            x, y, w = crop['x'], crop['y'], crop['width']
+            is_vertical = crop['vertical']
+            h = self.calculate_height(w, is_vertical)
+            dx, dy = self.to_display(x), self.to_display(y)
+            dx2, dy2 = self.to_display(x + w), self.to_display(y + h)
             
             # Draw semi-transparent overlay
-            overlay = display.copy()
-            cv2.rectangle(overlay, (x, y), (x + w, y + h), (0, 255, 0), -1)
-            cv2.addWeighted(overlay, 0.2, display, 0.8, 0, display)
+            self.tint_region(display, dx, dy, dx2, dy2, (0, 255, 0), 0.2)
             
             # Draw border
-            cv2.rectangle(display, (x, y), (x + w, y + h), (0, 255, 0), 3)
+            cv2.rectangle(display, (dx, dy), (dx2, dy2), (0, 255, 0), 3)
             
             # Add label
             ratio_text = "9:16" if is_vertical else "16:9"
-            cv2.putText(display, f"Content: {w}x{h} ({ratio_text})", 
-                       (x, y - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+            put_cached_text(display, f"Content: {w}x{h} ({ratio_text})", 
+                            (dx, dy - 15), 0.8, (0, 255, 0), 2)
             cv2.putText(display, f"Position: ({x}, {y})", 
-                       (x, y - 45), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+                       (dx, dy - 45), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
         else:
             # Draw multiple crop areas
             for i, region in enumerate(crops):
-                region_with_dims = self.get_crop_with_dimensions(region)
-                x, y = region_with_dims['x'], region_with_dims['y']
-                w, h = region_with_dims['width'], region_with_dims['height']
-                is_vertical = region.get('vertical', False)
+                x, y, w = region['x'], region['y'], region['width']
+                is_vertical = region['vertical']
+                h = self.calculate_height(w, is_vertical)
+                dx, dy = self.to_display(x), self.to_display(y)
+                dx2, dy2 = self.to_display(x + w), self.to_display(y + h)
                 
                 # Use different color for selected region
                 if i == self.selected_region:
@@ -217,121 +364,134 @@ class CropPositionFinder:
                     thickness = 2
                 
                 # Draw semi-transparent overlay
-                overlay = display.copy()
-                cv2.rectangle(overlay, (x, y), (x + w, y + h), color, -1)
-                cv2.addWeighted(overlay, 0.15, display, 0.85, 0, display)
+                self.tint_region(display, dx, dy, dx2, dy2, color, 0.15)
                 
                 # Draw border
-                cv2.rectangle(display, (x, y), (x + w, y + h), color, thickness)
+                cv2.rectangle(display, (dx, dy), (dx2, dy2), color, thickness)
                 
                 # Add label
                 ratio_text = "9:16" if is_vertical else "16:9"
                 label = f"Pos {i+1}: {w}x{h} ({ratio_text})"
                 if i == self.selected_region:
                     label += " [ACTIVE]"
-                cv2.putText(display, label, 
-                           (x, y - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+                put_cached_text(display, label, 
+                                (dx, dy - 15), 0.7, color, 2)
                 cv2.putText(display, f"({x}, {y})", 
-                           (x, y - 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+                           (dx, dy - 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
         
-        # Draw mouse crosshair
-        cv2.line(display, (self.mouse_x, 0), (self.mouse_x, display.shape[0]), (0, 255, 255), 1)
-        cv2.line(display, (0, self.mouse_y), (display.shape[1], self.mouse_y), (0, 255, 255), 1)
-        
-        # Draw mouse coordinates
-        coord_text = f"Mouse: ({self.mouse_x}, {self.mouse_y})"
-        cv2.putText(display, coord_text, 
-                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-        
-        # Draw instructions
-        instructions = [
-            "CONTROLS:",
-            "N = Change # of speakers",
-            "S/C = Scene (Speakers/Content)",
-            "1-5 = Select position",
-            "V = Toggle vertical/horizontal",
-            "+/- = Adjust width",
-            "Left Click = Set position",
-            "Right Click = Pixel color",
-            "P = Print config",
-            "Q = Quit"
-        ]
-        
-        y_offset = 70
-        for instruction in instructions:
-            cv2.putText(display, instruction, 
-                       (10, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-            y_offset += 25
+        # Draw instructions (pre-rendered once)
+        alpha, top = self._instructions_sprite
+        region = display[top:top + alpha.shape[0], 10:10 + alpha.shape[1]]
+        h, w = region.shape[:2]
+        blend_text(region, alpha[:h, :w], (255, 255, 255))
         
         mode_text = f"{self.num_speakers} SPEAKERS - {self.scene_type.upper()} SCENE"
         crops = self.get_current_crops()
-        if not (self.num_speakers == 3 and self.scene_type == 'content'):
+        if not self.is_single_content():
             mode_text += f" - Position {self.selected_region + 1}/{len(crops)}"
-        cv2.putText(display, mode_text, 
-                   (10, display.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
+        put_cached_text(display, mode_text, 
+                        (10, display.shape[0] - 20), 0.8, (255, 255, 0), 2)
         
         return display
     
+    def region_config_line(self, region):
+        """One region as a line of the printed config"""
+        height = self.calculate_height(region['width'], region['vertical'])
+        ratio = "9:16" if region['vertical'] else "16:9"
+        return f"        {{'x': {region['x']}, 'y': {region['y']}, 'width': {region['width']}, 'height': {height}}},  # {ratio}"
+    
     def print_config(self):
         """Print the current configuration in Python format"""
-        print("\n" + "="*70)
-        print("COPY THIS TO YOUR 3_crop_to_vertical.py FILE:")
-        print("="*70)
+        # Built as one string and written at once
+        lines = [
+            "\n" + "="*70,
+            "COPY THIS TO YOUR 3_crop_to_vertical.py FILE:",
+            "="*70
+        ]
         
         if self.num_speakers == 3:
-            print("\n# 3 SPEAKERS (height auto-calculated for 16:9)")
-            print("CROP_POSITIONS_3 = {")
-            print("    'speakers': [")
-            for i, region in enumerate(self.crop_3_speakers):
-                region_with_dims = self.get_crop_with_dimensions(region)
-                ratio = "9:16" if region.get('vertical', False) else "16:9"
-                print(f"        {{'x': {region['x']}, 'y': {region['y']}, 'width': {region['width']}, 'height': {region_with_dims['height']}}},  # {ratio}")
-            print("    ],")
-            print("    'content': {")
-            content_with_dims = self.get_crop_with_dimensions(self.crop_3_content)
-            ratio = "9:16" if self.crop_3_content.get('vertical', False) else "16:9"
-            print(f"        'x': {self.crop_3_content['x']},")
-            print(f"        'y': {self.crop_3_content['y']},")
-            print(f"        'width': {self.crop_3_content['width']},")
-            print(f"        'height': {content_with_dims['height']}  # {ratio}")
-            print("    }")
-            print("}")
-        
-        elif self.num_speakers == 4:
-            print("\n# 4 SPEAKERS (height auto-calculated for 16:9)")
-            print("CROP_POSITIONS_4 = {")
-            print("    'speakers': [")
-            for region in self.crop_4_speakers:
-                region_with_dims = self.get_crop_with_dimensions(region)
-                ratio = "9:16" if region.get('vertical', False) else "16:9"
-                print(f"        {{'x': {region['x']}, 'y': {region['y']}, 'width': {region['width']}, 'height': {region_with_dims['height']}}},  # {ratio}")
-            print("    ],")
-            print("    'content': [")
-            for region in self.crop_4_content:
-                region_with_dims = self.get_crop_with_dimensions(region)
-                ratio = "9:16" if region.get('vertical', False) else "16:9"
-                print(f"        {{'x': {region['x']}, 'y': {region['y']}, 'width': {region['width']}, 'height': {region_with_dims['height']}}},  # {ratio}")
-            print("    ]")
-            print("}")
-        
-        else:  # 5 speakers
-            print("\n# 5 SPEAKERS (height auto-calculated for 16:9)")
-            print("CROP_POSITIONS_5 = {")
-            print("    'speakers': [")
-            for region in self.crop_5_speakers:
-                region_with_dims = self.get_crop_with_dimensions(region)
-                ratio = "9:16" if region.get('vertical', False) else "16:9"
-                print(f"        {{'x': {region['x']}, 'y': {region['y']}, 'width': {region['width']}, 'height': {region_with_dims['height']}}},  # {ratio}")
-            print("    ],")
-            print("    'content': [")
-            for region in self.crop_5_content:
-                region_with_dims = self.get_crop_with_dimensions(region)
-                ratio = "9:16" if region.get('vertical', False) else "16:9"
-                print(f"        {{'x': {region['x']}, 'y': {region['y']}, 'width': {region['width']}, 'height': {region_with_dims['height']}}},  # {ratio}")
-            print("    ]")
-            print("}")
+            content = self.crop_3_content
+            ratio = "9:16" if content['vertical'] else "16:9"
+            lines.append("\n# 3 SPEAKERS (height auto-calculated for 16:9)")
+            lines.append("CROP_POSITIONS_3 = {")
+            lines.append("    'speakers': [")
+            lines.extend(self.region_config_line(region) for region in self.crop_3_speakers)
+            lines.extend([
+                "    ],",
+                "    'content': {",
+                f"        'x': {content['x']},",
+                f"        'y': {content['y']},",
+                f"        'width': {content['width']},",
+                f"        'height': {self.calculate_height(content['width'], content['vertical'])}  # {ratio}",
+                "    }",
+                "}"
+            ])
+        else:  # 4 or 5 speakers
+            if self.num_speakers == 4:
+                speakers, content = self.crop_4_speakers, self.crop_4_content
+            else:
+                speakers, content = self.crop_5_speakers, self.crop_5_content
+            lines.append(f"\n# {self.num_speakers} SPEAKERS (height auto-calculated for 16:9)")
+            lines.append(f"CROP_POSITIONS_{self.num_speakers} = {{")
+            lines.append("    'speakers': [")
+            lines.extend(self.region_config_line(region) for region in speakers)
+            lines.append("    ],")
+            lines.append("    'content': [")
+            lines.extend(self.region_config_line(region) for region in content)
+            lines.append("    ]")
+            lines.append("}")
         
-        print("="*70 + "\n")
+        lines.append("="*70 + "\n")
+        print("\n".join(lines))
+    
+    def is_single_content(self):
+        """3-speaker content scenes have a single crop instead of numbered positions"""
+        return self.num_speakers == 3 and self.scene_type == 'content'
+    
+    def choose_num_speakers(self):
+        """N: wait for 3/4/5 and switch the number of speakers"""
+        print("\nSelect number of speakers:")
+        print("  3 = 3 speakers")
+        print("  4 = 4 speakers")  
+        print("  5 = 5 speakers")
+        num_key = cv2.waitKey(0) & 0xFF
+        if num_key in (ord('3'), ord('4'), ord('5')):
+            self.num_speakers = num_key - ord('0')
+            self.selected_region = 0
+            print(f"\n→ Switched to {self.num_speakers} speakers")
+    
+    def set_scene(self, scene_type):
+        """S/C: switch to the speakers or content scene"""
+        self.scene_type = scene_type
+        self.selected_region = 0
+        print(f"\n→ Switched to {scene_type.upper()} scene")
+    
+    def select_region(self, region_idx):
+        """1-5: select the position to edit, if the current configuration has it"""
+        if region_idx < len(self.get_current_crops()):
+            self.selected_region = region_idx
+            print(f"\n→ Selected Position {region_idx + 1}")
+    
+    def toggle_vertical(self):
+        """V: toggle the selected crop between 16:9 and 9:16"""
+        current_crop = self.get_current_crops()[self.selected_region]
+        current_crop['vertical'] = not current_crop['vertical']
+        ratio = "9:16" if current_crop['vertical'] else "16:9"
+        if self.is_single_content():
+            print(f"\n→ Toggled to {ratio} aspect ratio")
+        else:
+            print(f"\n→ Position {self.selected_region + 1} toggled to {ratio}")
+    
+    def adjust_width(self, delta):
+        """+/-: change the selected crop's width (never below 10)"""
+        current_crop = self.get_current_crops()[self.selected_region]
+        current_crop['width'] = max(10, current_crop['width'] + delta)
+        new_height = self.calculate_height(current_crop['width'], current_crop['vertical'])
+        if self.is_single_content():
+            direction = "increased" if delta > 0 else "decreased"
+            print(f"\n→ Width {direction} to {current_crop['width']} (height: {new_height})")
+        else:
+            print(f"\n→ Position {self.selected_region + 1} width: {current_crop['width']} (height: {new_height})")
     
     def run(self):
         """Run the interactive position finder"""
@@ -359,97 +519,25 @@ class CropPositionFinder:
         print("="*70 + "\n")
         
         while True:
-            display = self.draw_overlay()
-            cv2.imshow(self.window_name, display)
+            # Only redraw when a mouse/key event came in; waitKey keeps the window responsive either way
+            if self._dirty:
+                display = self.draw_overlay()
+                cv2.imshow(self.window_name, display)
+                self._dirty = False
             
-            key = cv2.waitKey(1) & 0xFF
+            key = poll_key() & 0xFF
+            if key != 0xFF:
+                # Any key may change the crops/mode
+                self._cache_dirty = True
+                self._dirty = True
+            elif not self._dirty:
+                time.sleep(IDLE_POLL_SECONDS)  # Nothing happened: don't spin
             
             if key == ord('q') or key == 27:  # Q or ESC
                 break
-            elif key == ord('n'):  # Change number of speakers
-                print("\nSelect number of speakers:")
-                print("  3 = 3 speakers")
-                print("  4 = 4 speakers")  
-                print("  5 = 5 speakers")
-                num_key = cv2.waitKey(0) & 0xFF
-                if num_key == ord('3'):
-                    self.num_speakers = 3
-                    self.selected_region = 0
-                    print(f"\n→ Switched to 3 speakers")
-                elif num_key == ord('4'):
-                    self.num_speakers = 4
-                    self.selected_region = 0
-                    print(f"\n→ Switched to 4 speakers")
-                elif num_key == ord('5'):
-                    self.num_speakers = 5
-                    self.selected_region = 0
-                    print(f"\n→ Switched to 5 speakers")
-            elif key == ord('s'):  # Speakers scene
-                self.scene_type = 'speakers'
-                self.selected_region = 0
-                print(f"\n→ Switched to SPEAKERS scene")
-            elif key == ord('c'):  # Content scene
-                self.scene_type = 'content'
-                self.selected_region = 0
-                print(f"\n→ Switched to CONTENT scene")
-            elif key == ord('1'):
-                self.selected_region = 0
-                print(f"\n→ Selected Position 1")
-            elif key == ord('2'):
-                crops = self.get_current_crops()
-                if len(crops) > 1:
-                    self.selected_region = 1
-                    print(f"\n→ Selected Position 2")
-            elif key == ord('3'):
-                crops = self.get_current_crops()
-                if len(crops) > 2:
-                    self.selected_region = 2
-                    print(f"\n→ Selected Position 3")
-            elif key == ord('4'):
-                crops = self.get_current_crops()
-                if len(crops) > 3:
-                    self.selected_region = 3
-                    print(f"\n→ Selected Position 4")
-            elif key == ord('5'):
-                crops = self.get_current_crops()
-                if len(crops) > 4:
-                    self.selected_region = 4
-                    print(f"\n→ Selected Position 5")
-            elif key == ord('v'):  # Toggle vertical/horizontal
-                crops = self.get_current_crops()
-                if self.num_speakers == 3 and self.scene_type == 'content':
-                    self.crop_3_content['vertical'] = not self.crop_3_content.get('vertical', False)
-                    ratio = "9:16" if self.crop_3_content['vertical'] else "16:9"
-                    print(f"\n→ Toggled to {ratio} aspect ratio")
-                else:
-                    current_crop = crops[self.selected_region]
-                    current_crop['vertical'] = not current_crop.get('vertical', False)
-                    ratio = "9:16" if current_crop['vertical'] else "16:9"
-                    print(f"\n→ Position {self.selected_region + 1} toggled to {ratio}")
-            elif key == ord('+') or key == ord('='):  # Increase width
-                crops = self.get_current_crops()
-                if self.num_speakers == 3 and self.scene_type == 'content':
-                    self.crop_3_content['width'] += 10
-                    new_height = self.calculate_height(self.crop_3_content['width'], self.crop_3_content.get('vertical', False))
-                    print(f"\n→ Width increased to {self.crop_3_content['width']} (height: {new_height})")
-                else:
-                    current_crop = crops[self.selected_region]
-                    current_crop['width'] += 10
-                    new_height = self.calculate_height(current_crop['width'], current_crop.get('vertical', False))
-                    print(f"\n→ Position {self.selected_region + 1} width: {current_crop['width']} (height: {new_height})")
-            elif key == ord('-') or key == ord('_'):  # Decrease width
-                crops = self.get_current_crops()
-                if self.num_speakers == 3 and self.scene_type == 'content':
-                    self.crop_3_content['width'] = max(10, self.crop_3_content['width'] - 10)
-                    new_height = self.calculate_height(self.crop_3_content['width'], self.crop_3_content.get('vertical', False))
-                    print(f"\n→ Width decreased to {self.crop_3_content['width']} (height: {new_height})")
-                else:
-                    current_crop = crops[self.selected_region]
-                    current_crop['width'] = max(10, current_crop['width'] - 10)
-                    new_height = self.calculate_height(current_crop['width'], current_crop.get('vertical', False))
-                    print(f"\n→ Position {self.selected_region + 1} width: {current_crop['width']} (height: {new_height})")
-            elif key == ord('p'):  # Print config
-                self.print_config()
+            handler = self._key_handlers.get(key)
+            if handler is not None:
+                handler()
         
         cv2.destroyAllWindows()
         self.print_config()